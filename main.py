@@ -1,6 +1,6 @@
 import json
 from fastapi import FastAPI, UploadFile, File, Form, HTTPException, BackgroundTasks
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
@@ -21,7 +21,18 @@ load_dotenv()
 if not os.environ.get("HF_TOKEN", False):
     logger.warning("Warning: HF_TOKEN environment variable is not set")
 
-app = FastAPI(title="Voice Inpainting API")
+# Serialize API responses with orjson when it is installed
+try:
+    import orjson  # noqa: F401
+    from fastapi.responses import ORJSONResponse
+
+    default_response_class = ORJSONResponse
+except ImportError:
+    default_response_class = JSONResponse
+
+app = FastAPI(
+    title="Voice Inpainting API", default_response_class=default_response_class
+)
 
 # CORS middleware to allow requests from the frontend
 app.add_middleware(
@@ -106,8 +117,11 @@ async def tokenize_audio(
         logger.info(
             f"Tokenizing audio to get token metadata (semantic_only={semantic_only})..."
         )
-        tokenizer = AudioTokenizer(device=device)
-        tokenized_audio = tokenizer.tokenize(input_path, semantic_only=semantic_only)
+        # Keep Whisper loaded so later requests skip reloading it
+        tokenizer = AudioTokenizer(device=device, keep_whisper_loaded=True)
+        tokenized_audio = tokenizer.tokenize(
+            input_path, semantic_only=semantic_only, keep_audio=False
+        )
 
         # Log memory after tokenization
         MemoryManager.log_memory_stats("API: After tokenization")
@@ -145,7 +159,12 @@ async def tokenize_audio(
                             char_to_word[i] = word_info
 
             # Map tokens to text positions and extract metadata
-            for i in range(len(tokenized_audio.semantic_tokens or [])):
+            num_semantic_tokens = (
+                0
+                if tokenized_audio.semantic_tokens is None
+                else len(tokenized_audio.semantic_tokens)
+            )
+            for i in range(num_semantic_tokens):
                 # Check if this token index maps to a text position
                 if i in tokenized_audio.token_to_text_map:
                     char_idx = tokenized_audio.token_to_text_map[i]
@@ -372,8 +391,9 @@ async def process_audio_multi(
 
         # First tokenize the audio to get the mapping between semantic and RVQ tokens
         device = setup_device()
-        tokenizer = AudioTokenizer(device=device)
-        tokenized_audio = tokenizer.tokenize(input_path)
+        # Keep Whisper loaded so later requests skip reloading it
+        tokenizer = AudioTokenizer(device=device, keep_whisper_loaded=True)
+        tokenized_audio = tokenizer.tokenize(input_path, keep_audio=False)
 
         MemoryManager.log_memory_stats("API: After tokenization")
 
@@ -0,0 +1,192 @@
+"""
+Audio helpers shared by the tokenization, generation and watermarking steps.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Tuple
+
+import numpy as np
+import soundfile as sf
+import torch
+import torchaudio
+from loguru import logger
+
+
+@lru_cache(maxsize=16)
+def _get_resampler(
+    orig_freq: int, new_freq: int, device: str
+) -> torchaudio.transforms.Resample:
+    """Build (once) a resampler for a pair of sample rates on a device
+
+    Args:
+        orig_freq: Sample rate of the input
+        new_freq: Sample rate of the output
+        device: Device the sinc kernel lives on
+
+    Returns:
+        Resample transform with its kernel on the device
+    """
+    return torchaudio.transforms.Resample(orig_freq=orig_freq, new_freq=new_freq).to(
+        device
+    )
+
+
+def resample(waveform: torch.Tensor, orig_freq: int, new_freq: int) -> torch.Tensor:
+    """Resample audio on its current device, reusing the sinc kernel across calls
+
+    Equivalent to torchaudio.functional.resample, which rebuilds the kernel on
+    every call.
+
+    Args:
+        waveform: Audio tensor of shape (..., num_samples)
+        orig_freq: Sample rate of the input
+        new_freq: Sample rate of the output
+
+    Returns:
+        Resampled audio on the same device
+    """
+    if orig_freq == new_freq:
+        return waveform
+
+    resampler = _get_resampler(int(orig_freq), int(new_freq), str(waveform.device))
+    if waveform.dtype != torch.float32:
+        return resampler(waveform.float()).to(waveform.dtype)
+    return resampler(waveform)
+
+
+def to_device_async(tensor: torch.Tensor, device) -> torch.Tensor:
+    """Start copying a CPU tensor to a CUDA device without blocking the host
+
+    The tensor is staged in pinned memory so the copy runs asynchronously on the
+    current stream and overlaps with whatever the host does next (e.g. loading
+    a model). Kernels queued later on the same stream see the copied data.
+
+    Args:
+        tensor: Tensor to copy
+        device: Target device
+
+    Returns:
+        Tensor on the target device
+    """
+    if tensor.device.type != "cpu" or not str(device).startswith("cuda"):
+        return tensor.to(device)
+    return tensor.pin_memory().to(device, non_blocking=True)
+
+
+def load_audio(audio_path) -> Tuple[torch.Tensor, int]:
+    """Load an audio file as float32 samples
+
+    Reads with soundfile directly, which skips torchaudio's backend dispatch
+    for the common formats (WAV, FLAC, OGG, MP3). Anything soundfile cannot
+    decode falls back to torchaudio.
+
+    Args:
+        audio_path: Path to the audio file
+
+    Returns:
+        Tuple of (waveform of shape (channels, num_samples), sample_rate)
+    """
+    try:
+        samples, sample_rate = sf.read(audio_path, dtype="float32", always_2d=True)
+    except sf.LibsndfileError as e:
+        logger.info(f"soundfile cannot read {audio_path} ({e}), using torchaudio")
+        return torchaudio.load(audio_path)
+
+    # soundfile returns (frames, channels); share its memory as (channels, frames)
+    return torch.from_numpy(samples.T), sample_rate
+
+
+# Length of the blocks multichannel files are decoded and downmixed in
+_DOWNMIX_BLOCK_SECONDS = 10
+
+
+def load_audio_mono(audio_path) -> Tuple[torch.Tensor, int]:
+    """Load an audio file as mono float32 samples
+
+    Multichannel files are decoded and downmixed block by block, so only the
+    mono output and one block of all channels are in memory, rather than the
+    whole file with all its channels. Anything soundfile cannot decode falls
+    back to torchaudio.
+
+    Args:
+        audio_path: Path to the audio file
+
+    Returns:
+        Tuple of (waveform of shape (1, num_samples), sample_rate)
+    """
+    try:
+        with sf.SoundFile(audio_path) as f:
+            sample_rate = f.samplerate
+            if f.channels == 1:
+                samples = f.read(dtype="float32")
+                return torch.from_numpy(samples).unsqueeze(0), sample_rate
+
+            mono = np.empty(f.frames, dtype=np.float32)
+            block = np.empty(
+                (_DOWNMIX_BLOCK_SECONDS * sample_rate, f.channels), dtype=np.float32
+            )
+            num_frames = 0
+            while num_frames < len(mono):
+                # read returns a view of the filled part of the block
+                data = f.read(out=block[: len(mono) - num_frames])
+                if len(data) == 0:
+                    break
+                np.mean(data, axis=1, out=mono[num_frames : num_frames + len(data)])
+                num_frames += len(data)
+    except sf.LibsndfileError as e:
+        logger.info(f"soundfile cannot read {audio_path} ({e}), using torchaudio")
+        waveform, sample_rate = torchaudio.load(audio_path)
+        return waveform.mean(dim=0, keepdim=True), sample_rate
+
+    return torch.from_numpy(mono[:num_frames]).unsqueeze(0), sample_rate
+
+
+# LRU of mono waveforms already resampled for a target rate, keyed by file
+# identity (absolute path, modification time, size) and rate. Tokenizing the
+# same file again, e.g. re-uploading a voice message, skips decoding and
+# resampling. Cached tensors are shared, so callers must not modify them in
+# place.
+_RESAMPLED_CACHE_SIZE = 4
+_resampled_cache: OrderedDict = OrderedDict()
+_resampled_cache_lock = threading.Lock()
+
+
+def load_audio_resampled(audio_path, sample_rate: int) -> torch.Tensor:
+    """Load an audio file as a mono waveform at the given sample rate
+
+    Args:
+        audio_path: Path to the audio file
+        sample_rate: Target sample rate
+
+    Returns:
+        Waveform of shape (1, num_samples)
+    """
+    stat = os.stat(audio_path)
+    cache_key = (
+        os.path.abspath(audio_path),
+        stat.st_mtime_ns,
+        stat.st_size,
+        sample_rate,
+    )
+    with _resampled_cache_lock:
+        waveform = _resampled_cache.get(cache_key)
+        if waveform is not None:
+            _resampled_cache.move_to_end(cache_key)
+            logger.info(f"Using cached waveform for {audio_path}")
+            return waveform
+
+    waveform, sr = load_audio_mono(audio_path)
+
+    if sr != sample_rate:
+        logger.info(f"Resampling from {sr}Hz to {sample_rate}Hz")
+        waveform = resample(waveform, orig_freq=sr, new_freq=sample_rate)
+
+    with _resampled_cache_lock:
+        _resampled_cache[cache_key] = waveform
+        if len(_resampled_cache) > _RESAMPLED_CACHE_SIZE:
+            _resampled_cache.popitem(last=False)
+
+    return waveform
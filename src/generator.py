@@ -2,18 +2,20 @@
 Generator module for CSM model with improved memory management
 """
 
+import contextlib
+import os
 from dataclasses import dataclass
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 
 import torch
-import torchaudio
 from loguru import logger
 from src.models import Model, ModelArgs
 from src.watermarking import CSM_1B_GH_WATERMARK, load_watermarker, watermark
 from tokenizers.processors import TemplateProcessing
 from transformers import AutoTokenizer
 
-from src.mimi_tokenizer import MimiTokenizer
+from src.mimi_tokenizer import get_mimi_tokenizer
+from src.audio_utils import resample
 from src.memory_manager import MemoryManager
 
 
@@ -25,6 +27,30 @@ class Segment:
     audio: torch.Tensor
 
 
+def _attention_context(device):
+    """Attention kernel selection for frame generation
+
+    torchtune's attention already calls scaled_dot_product_attention. On CUDA
+    this restricts it to the fused Flash and memory-efficient kernels, which
+    tile the softmax instead of materializing the attention matrix, keeping
+    the math kernel only for inputs the fused ones reject.
+
+    Args:
+        device: Device the model runs on
+
+    Returns:
+        Context manager to run the transformers in
+    """
+    if not str(device).startswith("cuda"):
+        return contextlib.nullcontext()
+
+    from torch.nn.attention import SDPBackend, sdpa_kernel
+
+    return sdpa_kernel(
+        [SDPBackend.FLASH_ATTENTION, SDPBackend.EFFICIENT_ATTENTION, SDPBackend.MATH]
+    )
+
+
 def load_llama3_tokenizer():
     """
     https://github.com/huggingface/transformers/issues/22794#issuecomment-2092623992
@@ -57,7 +83,7 @@ class Generator:
 
         device = next(model.parameters()).device
         # Use MimiTokenizer for all platforms
-        self._audio_tokenizer = MimiTokenizer(device=device, num_codebooks=32)
+        self._audio_tokenizer = get_mimi_tokenizer(device=device, num_codebooks=32)
 
         # Lazy-load watermarker only when needed
         self._watermarker = None
@@ -223,26 +249,27 @@ class Generator:
                 f"Inputs too long, must be below max_seq_len - max_audio_frames: {max_seq_len}"
             )
 
-        for _ in range(max_audio_frames):
-            sample = self._model.generate_frame(
-                curr_tokens, curr_tokens_mask, curr_pos, temperature, topk
-            )
-            if torch.all(sample == 0):
-                break  # eos
-
-            samples.append(sample)
-
-            curr_tokens = torch.cat(
-                [sample, torch.zeros(1, 1).long().to(self.device)], dim=1
-            ).unsqueeze(1)
-            curr_tokens_mask = torch.cat(
-                [
-                    torch.ones_like(sample).bool(),
-                    torch.zeros(1, 1).bool().to(self.device),
-                ],
-                dim=1,
-            ).unsqueeze(1)
-            curr_pos = curr_pos[:, -1:] + 1
+        with _attention_context(self.device):
+            for _ in range(max_audio_frames):
+                sample = self._model.generate_frame(
+                    curr_tokens, curr_tokens_mask, curr_pos, temperature, topk
+                )
+                if torch.all(sample == 0):
+                    break  # eos
+
+                samples.append(sample)
+
+                curr_tokens = torch.cat(
+                    [sample, torch.zeros(1, 1).long().to(self.device)], dim=1
+                ).unsqueeze(1)
+                curr_tokens_mask = torch.cat(
+                    [
+                        torch.ones_like(sample).bool(),
+                        torch.zeros(1, 1).bool().to(self.device),
+                    ],
+                    dim=1,
+                ).unsqueeze(1)
+                curr_pos = curr_pos[:, -1:] + 1
 
         # Use MimiTokenizer's decode method without unnecessary reshaping
         audio = self._audio_tokenizer.decode(torch.stack(samples).permute(1, 2, 0))
@@ -265,14 +292,73 @@ class Generator:
         # Unload watermarker to free memory
         self._unload_watermarker()
 
-        audio = torchaudio.functional.resample(
-            audio, orig_freq=wm_sample_rate, new_freq=self.sample_rate
-        )
+        audio = resample(audio, orig_freq=wm_sample_rate, new_freq=self.sample_rate)
 
         return audio
 
 
-def load_csm_1b(ckpt_path: str = "ckpt.pt", device: str = "cuda") -> Generator:
+def _compile_model(model: Model):
+    """Compile the backbone and decoder transformers of the CSM model in place
+
+    Compiling in place keeps the modules' own methods (setup_caches,
+    reset_caches) available. The first generation after loading pays the
+    compilation cost; later loads reuse Inductor's on-disk FX graph cache.
+
+    Args:
+        model: CSM model to compile
+    """
+    os.environ.setdefault("TORCHINDUCTOR_FX_GRAPH_CACHE", "1")
+
+    logger.info("Compiling CSM backbone and decoder with torch.compile")
+    model.backbone.compile()
+    # The decoder runs once per codebook for every frame, with fixed shapes
+    model.decoder.compile()
+
+
+def _quantize_model(model: Model):
+    """Quantize the linear layers of the CSM model to int8 weights in place
+
+    Frame generation is bound by reading weights, so int8 weights roughly halve
+    the memory traffic per generated frame compared to bfloat16.
+
+    Args:
+        model: CSM model to quantize
+    """
+    from torchao.quantization import quantize_
+
+    try:
+        from torchao.quantization import Int8WeightOnlyConfig as int8_weight_only
+    except ImportError:
+        from torchao.quantization import int8_weight_only
+
+    logger.info("Quantizing CSM linear layers to int8 weights with torchao")
+    quantize_(model, int8_weight_only())
+
+
+def _env_flag(name: str) -> bool:
+    """Check whether an opt-in environment variable is set to a true value"""
+    return os.environ.get(name, "") not in ("", "0")
+
+
+def load_csm_1b(
+    ckpt_path: str = "ckpt.pt",
+    device: str = "cuda",
+    compile_model: Optional[bool] = None,
+    quantize_model: Optional[bool] = None,
+) -> Generator:
+    """Load the CSM 1B model and wrap it in a Generator
+
+    Args:
+        ckpt_path: Path to the model checkpoint
+        device: Device to load the model on
+        compile_model: Whether to compile the transformers with torch.compile
+            (None to enable it through the CSM_COMPILE environment variable)
+        quantize_model: Whether to quantize the weights to int8 with torchao
+            (None to enable it through the CSM_INT8 environment variable)
+
+    Returns:
+        Generator for the loaded model
+    """
     # Log memory before loading
     MemoryManager.log_memory_stats("Before loading CSM model")
 
@@ -296,6 +382,17 @@ def load_csm_1b(ckpt_path: str = "ckpt.pt", device: str = "cuda") -> Generator:
         state_dict = torch.load(ckpt_path)
         model.load_state_dict(state_dict)
 
+    # Quantize before compiling so the compiled graphs use the int8 kernels
+    if quantize_model is None:
+        quantize_model = _env_flag("CSM_INT8")
+    if quantize_model:
+        _quantize_model(model)
+
+    if compile_model is None:
+        compile_model = _env_flag("CSM_COMPILE")
+    if compile_model:
+        _compile_model(model)
+
     generator = Generator(model)
 
     # Log memory after loading
@@ -3,15 +3,15 @@ Integrated voice inpainting with end-to-end generation and improved memory manag
 Replaces the separate generation and fusion steps with a single coherent process.
 """
 
-import os
 import torch
-import torchaudio
-import tempfile
 from dataclasses import dataclass
-from typing import List, Tuple
+from functools import lru_cache
+from typing import List, Optional, Tuple
 from loguru import logger
 from huggingface_hub import hf_hub_download
 
+from src.audio_utils import to_device_async
+from src.mimi_tokenizer import MIMI_FRAME_RATE_DEN, MIMI_FRAME_RATE_NUM
 from src.tokenization import TokenizedAudio, AudioTokenizer
 from src.semantic_edit import EditOperation
 from src.generator import load_csm_1b
@@ -28,6 +28,18 @@ class Segment:
     audio: torch.Tensor
 
 
+@lru_cache(maxsize=1)
+def _csm_checkpoint_path() -> str:
+    """Resolve the local path of the CSM checkpoint, downloading it if needed
+
+    Cached so reloading the model does not query the Hub again.
+
+    Returns:
+        Path to the checkpoint file
+    """
+    return hf_hub_download(repo_id="sesame/csm-1b", filename="ckpt.pt")
+
+
 class IntegratedVoiceInpainting:
     """Performs voice inpainting in an end-to-end manner without separate generation and fusion"""
 
@@ -60,7 +72,7 @@ class IntegratedVoiceInpainting:
         logger.info("Initializing CSM model...")
         try:
             # Download the model if needed and load it
-            model_path = hf_hub_download(repo_id="sesame/csm-1b", filename="ckpt.pt")
+            model_path = _csm_checkpoint_path()
             generator = load_csm_1b(model_path, self.device)
             self.sample_rate = generator.sample_rate
             logger.info("CSM model loaded successfully")
@@ -123,9 +135,10 @@ class IntegratedVoiceInpainting:
         # Extract pre-edit context
         if start_idx > 0:
             # Determine an appropriate amount of context to include
-            pre_start_idx = max(
-                0, start_idx - int(context_seconds * 12.5)
-            )  # 12.5 frames/second
+            context_frames = int(
+                context_seconds * MIMI_FRAME_RATE_NUM / MIMI_FRAME_RATE_DEN
+            )
+            pre_start_idx = max(0, start_idx - context_frames)
 
             # Extract audio for the pre-edit context
             pre_context_audio = self.tokenizer.extract_context_audio(
@@ -156,7 +169,7 @@ class IntegratedVoiceInpainting:
             pre_segment = Segment(
                 speaker=tokenized_audio.speaker_id,
                 text=pre_context_text,
-                audio=pre_context_audio.to(self.device),
+                audio=to_device_async(pre_context_audio, self.device),
             )
             segments.append(pre_segment)
 
@@ -165,7 +178,8 @@ class IntegratedVoiceInpainting:
             # Determine an appropriate amount of context
             post_end_idx = min(
                 tokenized_audio.rvq_tokens.shape[1],
-                end_idx + int(context_seconds * 12.5),  # 12.5 frames/second
+                end_idx
+                + int(context_seconds * MIMI_FRAME_RATE_NUM / MIMI_FRAME_RATE_DEN),
             )
 
             # Extract audio for the post-edit context
@@ -197,7 +211,7 @@ class IntegratedVoiceInpainting:
             post_segment = Segment(
                 speaker=tokenized_audio.speaker_id,
                 text=post_context_text,
-                audio=post_context_audio.to(self.device),
+                audio=to_device_async(post_context_audio, self.device),
             )
             segments.append(post_segment)
 
@@ -250,7 +264,8 @@ class IntegratedVoiceInpainting:
                     # Sanity check the result
                     if 40 <= ms_per_char <= 200:
                         logger.info(
-                            f"Detected speaking rate: {ms_per_char:.1f}ms per character"
+                            "Detected speaking rate: {:.1f}ms per character",
+                            ms_per_char,
                         )
                         default_ms_per_char = ms_per_char
         except Exception as e:
@@ -287,39 +302,76 @@ class IntegratedVoiceInpainting:
         Returns:
             Tuple of (inpainted_tokens, inpainted_audio, sample_rate)
         """
+        # Unload CSM model to free memory, also when generation fails
+        try:
+            inpainted_tokens = self._inpaint_tokens(
+                tokenized_audio, edit_op, temperature=temperature, topk=topk
+            )
+        finally:
+            self._unload_csm_model()
+
+        # Reconstruct final audio. The decoder's transient buffers stay in the
+        # caching allocator for the next edit; TokenStore empties it
+        # periodically.
+        inpainted_audio, sr = self.tokenizer.reconstruct_audio(inpainted_tokens)
+
+        return inpainted_tokens, inpainted_audio, sr
+
+    def _inpaint_tokens(
+        self,
+        tokenized_audio: TokenizedAudio,
+        edit_op: EditOperation,
+        temperature: float = 0.7,
+        topk: int = 25,
+        target_tokens: Optional[torch.Tensor] = None,
+        token_offset: int = 0,
+    ) -> torch.Tensor:
+        """Generate the RVQ tokens for a single edit
+
+        Loads the CSM model if needed but leaves unloading it, and reconstructing
+        audio from the tokens, to the caller.
+
+        Args:
+            tokenized_audio: TokenizedAudio object the edit's token range and
+                context refer to
+            edit_op: EditOperation with token range and edit details
+            temperature: Temperature for generation sampling
+            topk: Top-k sampling parameter
+            target_tokens: Tokens to splice the generated segment into,
+                defaults to tokenized_audio.rvq_tokens
+            token_offset: Shift of the edit range in target_tokens relative to
+                tokenized_audio, e.g. from earlier edits in a batch
+
+        Returns:
+            Inpainted RVQ tokens for the whole audio
+        """
         logger.info(
-            f"Performing integrated voice inpainting for: '{edit_op.edited_text}'"
+            "Performing integrated voice inpainting for: '{}'", edit_op.edited_text
         )
+        start_idx, end_idx = edit_op.start_token_idx, edit_op.end_token_idx
+        if target_tokens is None:
+            target_tokens = tokenized_audio.rvq_tokens
+        splice_start, splice_end = start_idx + token_offset, end_idx + token_offset
 
         # Handle empty edit text (deletion)
         if not edit_op.edited_text.strip():
             logger.info("Deletion detected, removing segment without generation")
             # Create output tokens by removing the specified range
-            start_idx, end_idx = edit_op.start_token_idx, edit_op.end_token_idx
-            inpainted_tokens = torch.cat(
-                [
-                    tokenized_audio.rvq_tokens[:, :start_idx],
-                    tokenized_audio.rvq_tokens[:, end_idx:],
-                ],
+            return torch.cat(
+                [target_tokens[:, :splice_start], target_tokens[:, splice_end:]],
                 dim=1,
             )
 
-            # Reconstruct audio from tokens
-            inpainted_audio, sr = self.tokenizer.reconstruct_audio(inpainted_tokens)
-            return inpainted_tokens, inpainted_audio, sr
-
         # Prepare context segments from original audio
         context_segments = self._prepare_context_segments(
-            tokenized_audio,
-            (edit_op.start_token_idx, edit_op.end_token_idx),
-            edit_op.edited_text,
+            tokenized_audio, (start_idx, end_idx), edit_op.edited_text
         )
 
         # Calculate appropriate audio length
         max_audio_length_ms = self._estimate_audio_length(
             edit_op.edited_text, tokenized_audio
         )
-        logger.info(f"Using max audio length: {max_audio_length_ms}ms for generation")
+        logger.info("Using max audio length: {}ms for generation", max_audio_length_ms)
 
         # Lazy-load the CSM model if needed
         if self.generator is None:
@@ -337,56 +389,39 @@ class IntegratedVoiceInpainting:
                 topk=topk,
             )
 
-            # Unload CSM model to free memory
-            self._unload_csm_model()
-
-            # Convert to RVQ tokens
-            with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp_file:
-                tmp_path = tmp_file.name
-
-                # Save audio to temporary file
-                audio_for_saving = audio.view(1, -1) if audio.dim() == 1 else audio
-                torchaudio.save(tmp_path, audio_for_saving.cpu(), self.sample_rate)
-
-                # Encode audio to get RVQ tokens
-                audio_for_encoding = audio.to(self.device)
-
-                try:
-                    # Try streaming encoder first
-                    new_tokens = self.tokenizer.mimi.encode_step(audio_for_encoding)
-                    logger.info("Used streaming encoder for token generation")
-                except Exception as e:
-                    # Fall back to regular encode
-                    logger.warning(
-                        f"Streaming encode failed: {e}, falling back to regular encode"
-                    )
-                    new_tokens = self.tokenizer.mimi.encode(audio_for_encoding)
-
-                # Clean up temporary file
-                os.unlink(tmp_path)
-
-            # Create inpainted tokens by combining original and new tokens
-            start_idx, end_idx = edit_op.start_token_idx, edit_op.end_token_idx
+            # Encode the generated audio to RVQ tokens directly from memory
+            audio_for_encoding = audio.to(self.device)
+
+            try:
+                # Try streaming encoder first
+                new_tokens = self.tokenizer.mimi.encode_step(audio_for_encoding)
+                logger.info("Used streaming encoder for token generation")
+            except Exception as e:
+                # Fall back to regular encode
+                logger.warning(
+                    f"Streaming encode failed: {e}, falling back to regular encode"
+                )
+                new_tokens = self.tokenizer.mimi.encode(audio_for_encoding)
+
+            # Create inpainted tokens by combining original and new tokens. Only
+            # the short generated segment changes device; the full token matrix
+            # stays where the token store keeps it and is transferred at most
+            # once, when the audio is reconstructed.
             inpainted_tokens = torch.cat(
                 [
-                    tokenized_audio.rvq_tokens.to(new_tokens.device)[:, :start_idx],
-                    new_tokens,
-                    tokenized_audio.rvq_tokens.to(new_tokens.device)[:, end_idx:],
+                    target_tokens[:, :splice_start],
+                    new_tokens.to(target_tokens.device, target_tokens.dtype),
+                    target_tokens[:, splice_end:],
                 ],
                 dim=1,
             )
 
-            # Reconstruct final audio
-            inpainted_audio, sr = self.tokenizer.reconstruct_audio(inpainted_tokens)
-
-            logger.info(
-                f"Integrated inpainting completed: {new_tokens.shape[1]} generated frames inserted"
-            )
-
-            # Clear GPU memory
-            MemoryManager.clear_gpu_memory()
+        logger.info(
+            "Integrated inpainting completed: {} generated frames inserted",
+            new_tokens.shape[1],
+        )
 
-            return inpainted_tokens, inpainted_audio, sr
+        return inpainted_tokens
 
     def batch_inpaint(
         self,
@@ -414,54 +449,41 @@ class IntegratedVoiceInpainting:
         # Sort edit operations by start index (process from left to right)
         sorted_edits = sorted(edit_operations, key=lambda op: op.start_token_idx)
 
-        # Start with the original tokens
+        # Start with the original tokens. Context audio and text come from the
+        # original state at each edit's own indices; only the splice into the
+        # current tokens is shifted by the length change of earlier edits.
         current_tokens = tokenized_audio.rvq_tokens
-        token_offset = 0  # Track how indices shift due to previous edits
-
-        # Process each edit sequentially
-        for i, edit_op in enumerate(sorted_edits):
-            logger.info(
-                f"Processing edit {i + 1}/{len(sorted_edits)}: '{edit_op.original_text}' -> '{edit_op.edited_text}'"
-            )
-
-            # Adjust indices based on previous edits
-            if token_offset != 0:
-                edit_op.start_token_idx += token_offset
-                edit_op.end_token_idx += token_offset
-                if edit_op.prepadding_start_token_idx >= 0:
-                    edit_op.prepadding_start_token_idx += token_offset
-                if edit_op.prepadding_end_token_idx >= 0:
-                    edit_op.prepadding_end_token_idx = (
-                        edit_op.start_token_idx
-                    )  # Always ends at start
-
-            # Create updated TokenizedAudio with current tokens
-            updated_audio = TokenizedAudio(
-                audio=tokenized_audio.audio,
-                sample_rate=tokenized_audio.sample_rate,
-                rvq_tokens=current_tokens,
-                text=tokenized_audio.text,
-                segments=tokenized_audio.segments,
-                semantic_tokens=tokenized_audio.semantic_tokens,
-                text_to_token_map=tokenized_audio.text_to_token_map,
-                token_to_text_map=tokenized_audio.token_to_text_map,
-                speaker_id=tokenized_audio.speaker_id,
-                word_timestamps=tokenized_audio.word_timestamps,
-            )
+        token_offset = 0
 
-            # Process this edit
-            inpainted_tokens, _, _ = self.inpaint(
-                updated_audio, edit_op, temperature=temperature, topk=topk
-            )
-
-            # Update current tokens and token offset
-            old_length = edit_op.end_token_idx - edit_op.start_token_idx
-            new_length = inpainted_tokens.shape[1] - (
-                current_tokens.shape[1] - old_length
-            )
-            token_offset += new_length - old_length
-            current_tokens = inpainted_tokens
+        # Process each edit sequentially. CSM is unloaded once all edits are
+        # generated, or when one of them fails.
+        try:
+            for i, edit_op in enumerate(sorted_edits):
+                logger.info(
+                    "Processing edit {}/{}: '{}' -> '{}'",
+                    i + 1,
+                    len(sorted_edits),
+                    edit_op.original_text,
+                    edit_op.edited_text,
+                )
+
+                # Process this edit, keeping CSM loaded for the next one
+                inpainted_tokens = self._inpaint_tokens(
+                    tokenized_audio,
+                    edit_op,
+                    temperature=temperature,
+                    topk=topk,
+                    target_tokens=current_tokens,
+                    token_offset=token_offset,
+                )
+
+                # Later edits move by this edit's change in length
+                token_offset += inpainted_tokens.shape[1] - current_tokens.shape[1]
+                current_tokens = inpainted_tokens
+        finally:
+            self._unload_csm_model()
 
-        # Reconstruct final audio
+        # Reconstruct final audio once for all edits
         final_audio, sample_rate = self.tokenizer.reconstruct_audio(current_tokens)
+
         return current_tokens, final_audio, sample_rate
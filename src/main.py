@@ -8,6 +8,7 @@ from typing import Dict, List, Optional, Union
 import torch
 import torchaudio
 import os
+import shutil
 import time
 import argparse
 import platform
@@ -105,18 +106,16 @@ def voice_inpainting(
             logger.info(f"Using existing token store session: {session_id}")
             is_new_session = False
 
-    # Create new token store if needed
+    # Create, initialize and register a new token store if needed, so later
+    # requests can continue the session by its ID
     if token_store is None:
-        from src.token_store import TokenStore
+        from src.token_store import create_token_store
 
-        token_store = TokenStore(device=device)
+        token_store = create_token_store(input_file, device=device)
         logger.info(
             f"Created new token store with session ID: {token_store.get_session_id()}"
         )
 
-        # Initialize token store with input audio
-        token_store.initialize(input_file)
-
         # Save original audio for reference if in debug mode
         if debug:
             original_state = token_store.get_current_state()
@@ -141,11 +140,14 @@ def voice_inpainting(
         # Use SemanticEditor to find edit region
         from src.semantic_edit import SemanticEditor
 
-        editor = SemanticEditor(token_store.tokenizer, load_llm=True)
+        # Keep the LLM loaded so later requests reuse the process-wide instance
+        editor = SemanticEditor(
+            token_store.tokenizer, load_llm=True, keep_llm_loaded=True
+        )
         edit_op = editor.find_edit_region(current_state, edits)
 
-        # Apply edit through token store
-        token_store.apply_edit(
+        # Apply edit through token store, which returns the updated state
+        result_state = token_store.apply_edit(
             edit_op.start_token_idx, edit_op.end_token_idx, edit_op.edited_text
         )
 
@@ -178,8 +180,8 @@ def voice_inpainting(
         # Multiple edit operations
         logger.info(f"Processing {len(edits)} edit operations")
 
-        # Apply all edits through token store
-        token_store.apply_edit_operations(edits)
+        # Apply all edits through token store, which returns the updated state
+        result_state = token_store.apply_edit_operations(edits)
 
         # Save debug info for each edit if enabled
         if debug:
@@ -195,32 +197,29 @@ def voice_inpainting(
         # Track edit operations for the response
         edit_operations = edits
 
-    # Get the updated state and save the output
-    result_state = token_store.get_current_state()
+    # Get the current version directly instead of serializing the whole history
+    version_index = token_store.get_current_version_index()
+    current_version = token_store.get_version(version_index=version_index)
+    total_versions = len(token_store.versions)
+
+    # Extract generated regions
+    generated_regions = current_version.generated_regions
 
     # Save output audio
     out_dir = os.path.dirname(output_file)
     if out_dir and not os.path.exists(out_dir):
         os.makedirs(out_dir, exist_ok=True)
 
+    # The token store writes this version's audio as WAV in the background, so
+    # wait for it and copy the file instead of encoding the tensor again
     logger.info(f"Saving final audio to {output_file}")
-    torchaudio.save(
-        output_file, result_state.audio.unsqueeze(0), result_state.sample_rate
-    )
+    token_store.wait_for_pending_saves()
+    shutil.copyfile(current_version.audio_path, output_file)
 
     # Save debug output if enabled
     if debug:
         debug_output = os.path.join(debug_dir, "04_inpainted_result.wav")
-        torchaudio.save(
-            debug_output, result_state.audio.unsqueeze(0), result_state.sample_rate
-        )
-
-    # Get version information
-    versions = token_store.get_versions()
-    current_version = versions[token_store.get_current_version_index()]
-
-    # Extract generated regions
-    generated_regions = current_version.get("generated_regions", [])
+        shutil.copyfile(current_version.audio_path, debug_output)
 
     # Calculate total processing time
     elapsed_time = time.time() - start_time
@@ -232,7 +231,7 @@ def voice_inpainting(
     response = {
         "tokenization": {
             "text": result_state.text,
-            "tokens": [],
+            "tokens": token_store.format_tokens(),
             "token_to_text_map": {
                 str(k): v for k, v in (result_state.token_to_text_map or {}).items()
             },
@@ -248,22 +247,10 @@ def voice_inpainting(
         "edit_operations": edit_operations,
         "generated_regions": generated_regions,
         "session_id": token_store.get_session_id(),
-        "version_index": token_store.get_current_version_index(),
-        "total_versions": len(versions),
+        "version_index": version_index,
+        "total_versions": total_versions,
     }
 
-    # Extract token metadata for the response
-    if result_state.word_timestamps:
-        for word_info in result_state.word_timestamps:
-            token_info = {
-                "token_idx": word_info.get("token_idx", -1),
-                "text": word_info.get("text", ""),
-                "start_time": word_info.get("start", 0),
-                "end_time": word_info.get("end", 0),
-                "confidence": word_info.get("confidence", 1.0),
-            }
-            response["tokenization"]["tokens"].append(token_info)
-
     return response
 
 
@@ -3,9 +3,21 @@ Memory management utilities for handling GPU memory.
 """
 
 import gc
+import os
 import torch
 from loguru import logger
 
+# Let the CUDA caching allocator grow segments in place instead of carving
+# fixed-size blocks, which keeps fragmentation low across the model load and
+# unload cycles. This only takes effect before the first CUDA allocation, and
+# every module that touches the GPU imports this one first.
+os.environ.setdefault("PYTORCH_CUDA_ALLOC_CONF", "expandable_segments:True")
+
+# Load CUDA kernels on first use rather than all at context creation, which
+# saves device memory for the kernels of the many libraries that are never
+# launched. Also read when the CUDA context is created.
+os.environ.setdefault("CUDA_MODULE_LOADING", "LAZY")
+
 
 class MemoryManager:
     """Utility class for managing model memory and clearing GPU cache"""
@@ -30,6 +42,18 @@ class MemoryManager:
             torch.cuda.ipc_collect()
         logger.info("GPU memory cleared")
 
+    @staticmethod
+    def gpu_free_bytes():
+        """Free memory on the current CUDA device
+
+        Returns:
+            Free bytes as reported by the driver, or None without CUDA
+        """
+        if not torch.cuda.is_available():
+            return None
+        free_bytes, _ = torch.cuda.mem_get_info()
+        return free_bytes
+
     @staticmethod
     def to_cpu(model):
         """Move model to CPU and return it"""
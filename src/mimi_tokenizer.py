@@ -2,7 +2,10 @@
 Platform-specific adapter for audio tokenization using moshi or moshi_mlx depending on the platform.
 """
 
+import contextlib
 import platform
+import threading
+import weakref
 import torch
 import numpy as np
 from loguru import logger
@@ -14,6 +17,61 @@ def is_apple_silicon():
     return platform.system() == "Darwin" and platform.machine() == "arm64"
 
 
+def _mimi_autocast(device):
+    """Autocast context for encoding and decoding with the torch backend
+
+    Mimi runs in bfloat16 on GPUs that support it, which halves the memory
+    traffic of its convolutions and transformers. Elsewhere it stays in
+    float32. Encoded RVQ tokens are integer codes either way.
+
+    Args:
+        device: Device the model runs on
+
+    Returns:
+        Context manager to run the decoder in
+    """
+    if (
+        str(device).startswith("cuda")
+        and torch.cuda.is_available()
+        and torch.cuda.is_bf16_supported()
+    ):
+        return torch.autocast(device_type="cuda", dtype=torch.bfloat16)
+    return contextlib.nullcontext()
+
+
+# Sample rate of the audio Mimi encodes and decodes
+MIMI_SAMPLE_RATE = 24000
+
+# Mimi's token frame rate, 12.5 Hz (80 ms frames), as an exact fraction so
+# that frame boundaries in samples can be computed with integer arithmetic
+MIMI_FRAME_RATE_NUM = 25
+MIMI_FRAME_RATE_DEN = 2
+
+# Live MimiTokenizers by (device, num_codebooks). Values are weak, so a
+# tokenizer is shared while any user holds it and freed after the last one.
+_mimi_tokenizers = weakref.WeakValueDictionary()
+_mimi_tokenizers_lock = threading.Lock()
+
+
+def get_mimi_tokenizer(device="cuda", num_codebooks=32):
+    """Get a MimiTokenizer for a device, reusing one that is still alive
+
+    Args:
+        device: Device to run inference on ("cpu", "cuda", "mps")
+        num_codebooks: Number of codebooks to use
+
+    Returns:
+        MimiTokenizer instance
+    """
+    key = (str(device), num_codebooks)
+    with _mimi_tokenizers_lock:
+        tokenizer = _mimi_tokenizers.get(key)
+        if tokenizer is None:
+            tokenizer = MimiTokenizer(device=device, num_codebooks=num_codebooks)
+            _mimi_tokenizers[key] = tokenizer
+        return tokenizer
+
+
 class MimiTokenizer:
     """
     Adapter class that uses moshi_mlx for Mimi tokenization on Apple Silicon,
@@ -29,7 +87,7 @@ class MimiTokenizer:
         """
         self.device = device
         self.num_codebooks = num_codebooks
-        self.sample_rate = 24000  # Fixed sample rate
+        self.sample_rate = MIMI_SAMPLE_RATE  # Fixed sample rate
 
         # Use different initialization based on platform
         if is_apple_silicon():
@@ -166,12 +224,13 @@ class MimiTokenizer:
             # Return a fallback empty tensor with the expected shape
             return torch.zeros((self.num_codebooks, 1), dtype=torch.long)
 
+    @torch.inference_mode()
     def _encode_torch(self, audio):
         """Encode audio using standard moshi backend"""
         try:
-            # Convert input to torch tensor if needed
+            # Convert input to torch tensor if needed, sharing numpy memory
             if not isinstance(audio, torch.Tensor):
-                audio = torch.tensor(audio, dtype=torch.float32)
+                audio = torch.from_numpy(np.ascontiguousarray(audio, dtype=np.float32))
 
             # Ensure correct shape [batch, channel, samples]
             if audio.dim() == 1:  # [samples]
@@ -187,7 +246,8 @@ class MimiTokenizer:
                 audio = audio.to(self.device)
 
             # Encode using standard moshi
-            tokens = self.tokenizer.encode(audio)
+            with _mimi_autocast(self.device):
+                tokens = self.tokenizer.encode(audio)
 
             # Ensure consistent shape [num_codebooks, seq_len]
             if tokens.dim() == 3:  # [batch, codebooks, seq_len]
@@ -259,12 +319,13 @@ class MimiTokenizer:
             # Return a fallback empty tensor with the expected shape
             return torch.zeros((self.num_codebooks, 1), dtype=torch.long)
 
+    @torch.inference_mode()
     def _encode_step_torch(self, audio):
         """Encode audio incrementally using standard moshi backend"""
         try:
-            # Convert input to torch tensor if needed
+            # Convert input to torch tensor if needed, sharing numpy memory
             if not isinstance(audio, torch.Tensor):
-                audio = torch.tensor(audio, dtype=torch.float32)
+                audio = torch.from_numpy(np.ascontiguousarray(audio, dtype=np.float32))
 
             # Ensure correct shape [batch, channel, samples]
             if audio.dim() == 1:  # [samples]
@@ -278,7 +339,8 @@ class MimiTokenizer:
             audio = audio.to(self.device)
 
             # Use encode_step for streaming
-            tokens = self.stream_tokenizer.encode(audio)
+            with _mimi_autocast(self.device):
+                tokens = self.stream_tokenizer.encode(audio)
 
             # Ensure consistent shape [num_codebooks, seq_len]
             if tokens.dim() == 3:  # [batch, codebooks, seq_len]
@@ -342,12 +404,13 @@ class MimiTokenizer:
             # Return a fallback empty audio tensor
             return torch.zeros(1920, dtype=torch.float32)
 
+    @torch.inference_mode()
     def _decode_torch(self, tokens):
         """Decode RVQ tokens using standard moshi backend"""
         try:
-            # Convert input to torch tensor if needed
+            # Convert input to torch tensor if needed, sharing numpy memory
             if not isinstance(tokens, torch.Tensor):
-                tokens = torch.tensor(tokens, dtype=torch.long)
+                tokens = torch.from_numpy(np.ascontiguousarray(tokens, dtype=np.int64))
 
             # Ensure correct shape [batch, codebooks, seq_len]
             if tokens.dim() == 2:  # [codebooks, seq_len]
@@ -358,13 +421,14 @@ class MimiTokenizer:
                 tokens = tokens.to(self.device)
 
             # Decode
-            audio = self.tokenizer.decode(tokens)
+            with _mimi_autocast(self.device):
+                audio = self.tokenizer.decode(tokens)
 
-            # Ensure 1D output [samples]
+            # Ensure 1D float32 output [samples]
             if audio.dim() > 1:
                 audio = audio.reshape(-1)
 
-            return audio
+            return audio.float()
 
         except Exception as e:
             logger.error(f"moshi decode error: {e}")
@@ -425,15 +489,16 @@ class MimiTokenizer:
             # Return a fallback empty audio tensor
             return torch.zeros(1920, dtype=torch.float32)
 
+    @torch.inference_mode()
     def _decode_step_torch(self, tokens):
         """Decode RVQ tokens incrementally using standard moshi backend"""
         try:
             # Reset state for streaming (if applicable in standard moshi)
             self.stream_tokenizer.reset_state()
 
-            # Convert input to torch tensor if needed
+            # Convert input to torch tensor if needed, sharing numpy memory
             if not isinstance(tokens, torch.Tensor):
-                tokens = torch.tensor(tokens, dtype=torch.long)
+                tokens = torch.from_numpy(np.ascontiguousarray(tokens, dtype=np.int64))
 
             # Ensure correct shape [batch, codebooks, seq_len]
             if tokens.dim() == 2:  # [codebooks, seq_len]
@@ -444,13 +509,14 @@ class MimiTokenizer:
                 tokens = tokens.to(self.device)
 
             # Use decode_step for streaming
-            audio = self.stream_tokenizer.decode_step(tokens)
+            with _mimi_autocast(self.device):
+                audio = self.stream_tokenizer.decode_step(tokens)
 
-            # Ensure 1D output [samples]
+            # Ensure 1D float32 output [samples]
             if audio.dim() > 1:
                 audio = audio.reshape(-1)
 
-            return audio
+            return audio.float()
 
         except Exception as e:
             logger.error(f"moshi decode_step error: {e}")
@@ -4,22 +4,565 @@ Identifies token sequences to replace based on edit prompts,
 with focus on pre-padding context for better voice generation.
 """
 
+from __future__ import annotations
+
+import bisect
+import hashlib
 import json
-from typing import Tuple, Optional
+import os
+import re
+import sqlite3
+import threading
+import urllib.request
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Iterator, List, Tuple, Optional
 from dataclasses import dataclass
-from llama_cpp import Llama
+from functools import lru_cache
+from pathlib import Path
+import numpy as np
 from loguru import logger
 
 from src.tokenization import AudioTokenizer, TokenizedAudio
 from src.memory_manager import MemoryManager
 
+if TYPE_CHECKING:
+    from llama_cpp import Llama, LlamaGrammar
+
+# Parse LLM output with orjson when available. Its JSONDecodeError subclasses
+# json.JSONDecodeError, so error handling is the same for both.
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    json_loads = json.loads
+
+
+# Static part of the edit prompt, rendered in the Llama 3 chat format of the
+# preset models. The BOS token is added when tokenizing. The system turn
+# carries the instructions and the one-shot example, so the user turn only
+# holds the per-call message and edit prompt. The prefix never changes: it is
+# tokenized once per loaded model and llama.cpp reuses its KV cache across
+# queries while the model stays loaded.
+_EDIT_PROMPT_PREFIX = (
+    b"<|start_header_id|>system<|end_header_id|>\n\n"
+    b"You are a helpful assistant that outputs in JSON. "
+    b"Find the minimal contiguous substring subseq_original of the original message "
+    b"to replace and the text subseq_edited to replace it with, so that the edited "
+    b"message is syntactically and semantically correct. "
+    b'Answer with {"subseq_original": string, "subseq_edited": string}.\n\n'
+    b"Original Message: 'The quick brown fox jumps over the lazy dog.'\n"
+    b"Edit Prompt: 'Turn the fox into a funny yellow cow'\n"
+    b'JSON Output: {"subseq_original": "fox", "subseq_edited": "funny yellow cow"}'
+    b"<|eot_id|><|start_header_id|>user<|end_header_id|>\n\n"
+)
+
+# Per-call user turn, filled with the UTF-8 encoded original message and edit
+# prompt using a single bytes %-format
+_EDIT_PROMPT_SUFFIX = (
+    b"Original Message: '%s'\nEdit Prompt: '%s'"
+    b"<|eot_id|><|start_header_id|>assistant<|end_header_id|>\n\n"
+)
+
+# Per-call part of the prompt for several edits at once. Filled with the
+# message and the numbered edit prompts, one per line.
+_EDIT_PROMPT_BATCH_SUFFIX = (
+    b"Apply each of the following edit prompts independently to the original "
+    b"message. Answer with a JSON array holding one output object per edit "
+    b"prompt, in the same order.\n"
+    b"Original Message: '%s'\n"
+    b"Edit Prompts:\n%s"
+    b"<|eot_id|><|start_header_id|>assistant<|end_header_id|>\n\n"
+)
+
+# Sentence boundaries that delimit padding context: sentence-ending punctuation
+# followed by whitespace, or a line break
+_BOUNDARY_RE = re.compile(r"[.!?]\s|\n")
+
+# Words (runs of non-whitespace) used to build padding context
+_WORD_RE = re.compile(r"\S+")
+
+# Number of words used as padding context when no sentence boundary is found
+_CONTEXT_WORDS = 5
+
+# Numba kernel for fuzzy substring matching. Built on first use; None until
+# then and False when numba is not available.
+_fuzzy_kernel = None
+
+
+def _get_fuzzy_kernel():
+    """Build (once) and return the jitted fuzzy matching kernel
+
+    The kernel computes, for every window of the text with the length of the
+    pattern, the banded Levenshtein distance between window and pattern. Text
+    and pattern are passed as arrays of unicode code points so that window
+    offsets are character indices.
+
+    Returns:
+        The kernel function, or None if numba is not available
+    """
+    global _fuzzy_kernel
+    if _fuzzy_kernel is None:
+        try:
+            import numba
+        except ImportError:
+            logger.info("numba not available, using NumPy prefilter for fuzzy matching")
+            _fuzzy_kernel = False
+            return None
+
+        @numba.njit(cache=True, parallel=True)
+        def window_distances(text, pattern, band):
+            num_windows = text.shape[0] - pattern.shape[0] + 1
+            m = pattern.shape[0]
+            # Any value above the largest reachable distance works as sentinel
+            # for cells outside the band
+            outside = m + band + 1
+            distances = np.empty(num_windows, dtype=np.int32)
+
+            for start in numba.prange(num_windows):
+                prev = np.empty(m + 1, dtype=np.int32)
+                curr = np.empty(m + 1, dtype=np.int32)
+                for k in range(m + 1):
+                    prev[k] = k if k <= band else outside
+
+                for j in range(1, m + 1):
+                    lo = max(1, j - band)
+                    hi = min(m, j + band)
+                    curr[0] = j if j <= band else outside
+                    curr[lo - 1] = curr[0] if lo == 1 else outside
+                    char = pattern[j - 1]
+                    for k in range(lo, hi + 1):
+                        best = prev[k - 1] + (0 if text[start + k - 1] == char else 1)
+                        if prev[k] + 1 < best:
+                            best = prev[k] + 1
+                        if curr[k - 1] + 1 < best:
+                            best = curr[k - 1] + 1
+                        curr[k] = best
+                    if hi < m:
+                        curr[hi + 1] = outside
+                    prev, curr = curr, prev
+
+                distances[start] = prev[m]
+
+            return distances
+
+        _fuzzy_kernel = window_distances
+
+    return _fuzzy_kernel or None
+
+
+# Number of windows the NumPy prefilter passes on to exact scoring
+_FUZZY_CANDIDATES = 8
+
+
+def _histogram_candidates(text: str, pattern: str, num_candidates: int) -> np.ndarray:
+    """Select the text windows most likely to match a pattern
+
+    Half the L1 distance between the character histograms of a window and the
+    pattern is a lower bound on their edit distance. Window counts of each
+    pattern character come from a 1-D cumulative sum, and characters outside
+    the pattern are counted together as the rest of the window, so memory
+    stays linear in the text length.
+
+    Args:
+        text: Text to search in
+        pattern: Pattern to search for, not longer than the text
+        num_candidates: Number of window start offsets to return
+
+    Returns:
+        Start offsets of the windows with the smallest histogram distance
+    """
+    m = len(pattern)
+    text_codes = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+    pattern_chars, pattern_counts = np.unique(
+        np.frombuffer(pattern.encode("utf-32-le"), dtype=np.uint32),
+        return_counts=True,
+    )
+
+    num_windows = len(text) - m + 1
+    distances = np.zeros(num_windows, dtype=np.int64)
+    matched = np.zeros(num_windows, dtype=np.int64)
+    prefix_counts = np.zeros(len(text) + 1, dtype=np.int32)
+
+    # Count each pattern character in every window from its prefix sums
+    for char, pattern_count in zip(pattern_chars, pattern_counts):
+        np.cumsum(text_codes == char, out=prefix_counts[1:])
+        window_counts = prefix_counts[m:] - prefix_counts[:-m]
+        distances += np.abs(window_counts - pattern_count)
+        matched += window_counts
+
+    # Characters that do not occur in the pattern all count as mismatches
+    distances += m - matched
+
+    if len(distances) <= num_candidates:
+        return np.arange(len(distances))
+    return np.argpartition(distances, num_candidates)[:num_candidates]
+
+
+def _levenshtein(a: str, b: str) -> int:
+    """Compute the Levenshtein distance between two strings
+
+    Args:
+        a: First string
+        b: Second string
+
+    Returns:
+        Minimum number of insertions, deletions and substitutions
+    """
+    prev = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        curr = [i]
+        for j, char_b in enumerate(b, 1):
+            curr.append(
+                min(prev[j] + 1, curr[j - 1] + 1, prev[j - 1] + (char_a != char_b))
+            )
+        prev = curr
+    return prev[-1]
+
+
+# LLM presets for semantic editing as (repo_id, filename pattern). Finding the
+# edit substring is simple structured extraction with grammar-constrained
+# output, so the default 1B model in 4-bit is accurate enough at a fraction of
+# the weight bandwidth of the 8B models.
+_LLM_PRESETS = {
+    "fast": ("bartowski/Llama-3.2-1B-Instruct-GGUF", "*Q4_K_M.gguf"),
+    "balanced": ("QuantFactory/Meta-Llama-3-8B-Instruct-GGUF", "*Q4_K_M.gguf"),
+    "high": ("QuantFactory/Meta-Llama-3-8B-Instruct-GGUF", "*Q8_0.gguf"),
+}
+
+# LRU cache of LLM edit proposals (subseq_original, subseq_edited), keyed by a
+# hash of model, prompt template, text and edit prompt. Retried edits and
+# undo/redo flows skip the LLM entirely on a hit.
+_PROPOSAL_CACHE_SIZE = 512
+_proposal_cache: OrderedDict[str, Tuple[str, str]] = OrderedDict()
+_proposal_cache_lock = threading.Lock()
+
+# Setting the EDIT_CACHE_PATH environment variable to a file path also
+# persists proposals in SQLite there, so the cache survives restarts. The file
+# holds transcript text and is never expired, so it is off by default and the
+# cache stays in memory only.
+_PROPOSAL_DB_PATH = os.environ.get("EDIT_CACHE_PATH", "")
+# Connection opened on first use; False once opening it failed
+_proposal_db = None
+
+
+def _get_proposal_db() -> Optional[sqlite3.Connection]:
+    """Open (once) the persistent proposal cache
+
+    Must be called with _proposal_cache_lock held.
+
+    Returns:
+        SQLite connection, or None if the persistent cache is disabled or unavailable
+    """
+    global _proposal_db
+    if _proposal_db is None:
+        _proposal_db = False
+        if not _PROPOSAL_DB_PATH:
+            return None
+        try:
+            Path(_PROPOSAL_DB_PATH).parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(_PROPOSAL_DB_PATH, check_same_thread=False)
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS proposals "
+                "(key TEXT PRIMARY KEY, original TEXT NOT NULL, edited TEXT NOT NULL)"
+            )
+            db.commit()
+            _proposal_db = db
+        except sqlite3.Error as e:
+            logger.warning(f"Persistent edit proposal cache unavailable: {e}")
+
+    return _proposal_db or None
+
+
+def _get_cached_proposal(cache_key: str) -> Optional[Tuple[str, str]]:
+    """Look up an edit proposal in the proposal cache
+
+    Args:
+        cache_key: Key from SemanticEditor._proposal_cache_key
+
+    Returns:
+        Cached (subseq_original, subseq_edited), or None on a miss
+    """
+    with _proposal_cache_lock:
+        proposal = _proposal_cache.get(cache_key)
+        if proposal is not None:
+            _proposal_cache.move_to_end(cache_key)
+            return proposal
+
+        # Fall back to the persistent cache and promote hits to memory
+        db = _get_proposal_db()
+        if db is None:
+            return None
+        try:
+            row = db.execute(
+                "SELECT original, edited FROM proposals WHERE key = ?", (cache_key,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Could not read edit proposal cache: {e}")
+            return None
+        if row is None:
+            return None
+
+        proposal = (row[0], row[1])
+        _proposal_cache[cache_key] = proposal
+        if len(_proposal_cache) > _PROPOSAL_CACHE_SIZE:
+            _proposal_cache.popitem(last=False)
+    return proposal
+
+
+def _cache_proposal(cache_key: str, proposal: Tuple[str, str]):
+    """Store an edit proposal in the proposal cache, evicting the oldest entry
+
+    Args:
+        cache_key: Key from SemanticEditor._proposal_cache_key
+        proposal: (subseq_original, subseq_edited) to store
+    """
+    with _proposal_cache_lock:
+        _proposal_cache[cache_key] = proposal
+        if len(_proposal_cache) > _PROPOSAL_CACHE_SIZE:
+            _proposal_cache.popitem(last=False)
+
+        db = _get_proposal_db()
+        if db is not None:
+            try:
+                with db:
+                    db.execute(
+                        "INSERT OR REPLACE INTO proposals VALUES (?, ?, ?)",
+                        (cache_key, *proposal),
+                    )
+            except sqlite3.Error as e:
+                logger.warning(f"Could not write edit proposal cache: {e}")
+
+
+def _default_gpu_layers() -> int:
+    """Pick how many LLM layers to offload to the GPU
+
+    The LLM_GPU_LAYERS environment variable takes precedence. Otherwise all
+    layers are offloaded when a CUDA or Metal device is available.
+
+    Returns:
+        Number of layers to offload (-1 for all, 0 for CPU only)
+    """
+    env_layers = os.environ.get("LLM_GPU_LAYERS")
+    if env_layers:
+        return int(env_layers)
+
+    import torch
+
+    if torch.cuda.is_available():
+        return -1
+    if hasattr(torch.backends, "mps") and torch.backends.mps.is_available():
+        return -1
+    return 0
+
+
+# llama.cpp states (KV cache and tokens) right after evaluating the static
+# prompt prefix, keyed by the model load arguments. Restoring one into a
+# freshly loaded model skips prefilling the prefix when the LLM is reloaded.
+_prefix_states: dict = {}
+_prefix_states_lock = threading.Lock()
+
+# Serializes get_llm, so concurrent first calls load the model only once
+_shared_llm_lock = threading.Lock()
+
+
+@lru_cache(maxsize=1)
+def _load_shared_llm(**load_args) -> Llama:
+    """Load the LLM behind get_llm; the cache holds the most recent model"""
+    from llama_cpp import Llama
+
+    logger.info(f"Initializing shared LLM for semantic editing: {load_args['repo_id']}")
+    return Llama.from_pretrained(**load_args)
+
+
+def get_llm(**load_args) -> Llama:
+    """Get the process-wide LLM for the given load arguments, loading it once
+
+    The model stays loaded across editors and requests. Loading once per process
+    also means a single mmap of the GGUF weights, which forked workers inherit
+    instead of each mapping the file again. Requesting different load arguments
+    replaces the cached model.
+
+    Args:
+        **load_args: Keyword arguments for Llama.from_pretrained
+
+    Returns:
+        Loaded LLM
+    """
+    with _shared_llm_lock:
+        return _load_shared_llm(**load_args)
+
+
+# GBNF grammar the LLM output is constrained to: a JSON object with exactly
+# the two string fields, in order. Whitespace is limited to single spaces so
+# the output can never run into the "\n\n" stop sequence.
+_EDIT_RESPONSE_GBNF = r"""
+edit ::= "{" ws "\"subseq_original\"" ws ":" ws string ws "," ws "\"subseq_edited\"" ws ":" ws string ws "}"
+string ::= "\"" ( [^"\\\x7F\x00-\x1F] | "\\" ( ["\\/bfnrt] | "u" [0-9a-fA-F]{4} ) )* "\""
+ws ::= " "?
+"""
+
+
+def _edit_grammar_text(count: int = 0) -> str:
+    """Render the GBNF output grammar for one or several edit proposals
+
+    Args:
+        count: Number of proposals in a JSON array, or 0 for a single object
+
+    Returns:
+        Grammar in GBNF notation
+    """
+    if count:
+        root = f'root ::= "[" ws edit ("," ws edit){{{count - 1}}} ws "]"\n'
+    else:
+        root = "root ::= edit\n"
+    return root + _EDIT_RESPONSE_GBNF
+
+
+@lru_cache(maxsize=8)
+def _edit_grammar(count: int = 0) -> LlamaGrammar:
+    """Build (once) the output grammar for one or several edit proposals
+
+    Args:
+        count: Number of proposals in a JSON array, or 0 for a single object
+
+    Returns:
+        Compiled grammar
+    """
+    from llama_cpp import LlamaGrammar
+
+    return LlamaGrammar.from_string(_edit_grammar_text(count), verbose=False)
+
+
+def _read_json_value(chunks: Iterator[dict]) -> str:
+    """Accumulate a streamed completion until its top-level JSON value closes
 
-@dataclass
+    Tracks brace and bracket depth (ignoring those inside JSON strings) and
+    stops reading, and with it decoding, at the end of the first object or array.
+
+    Args:
+        chunks: Streamed completion chunks from llama-cpp
+
+    Returns:
+        Generated text up to and including the closing brace or bracket
+    """
+    parts = []
+    depth = 0
+    in_string = False
+    escaped = False
+
+    try:
+        for chunk in chunks:
+            piece = chunk["choices"][0]["text"]
+            for i, char in enumerate(piece):
+                if in_string:
+                    if escaped:
+                        escaped = False
+                    elif char == "\\":
+                        escaped = True
+                    elif char == '"':
+                        in_string = False
+                elif char == '"':
+                    in_string = True
+                elif char in "{[":
+                    depth += 1
+                elif char in "}]":
+                    depth -= 1
+                    if depth == 0:
+                        parts.append(piece[: i + 1])
+                        return "".join(parts)
+            parts.append(piece)
+    finally:
+        # Stop the generator so llama-cpp does not decode any further tokens
+        chunks.close()
+
+    return "".join(parts)
+
+
+@lru_cache(maxsize=8)
+def _boundary_positions(text: str) -> Tuple[List[int], List[int]]:
+    """Find all sentence boundaries in a text
+
+    Scans the text once and caches the result, so padding lookups for every
+    edit on the same transcript are binary searches.
+
+    Args:
+        text: Text to scan
+
+    Returns:
+        Tuple of (starts, ends), the sorted start and end character indices
+        of every boundary match
+    """
+    starts = []
+    ends = []
+    for match in _BOUNDARY_RE.finditer(text):
+        starts.append(match.start())
+        ends.append(match.end())
+    return starts, ends
+
+
+@lru_cache(maxsize=8)
+def _word_positions(text: str) -> Tuple[List[int], List[int]]:
+    """Find all words in a text
+
+    Scans the text once and caches the result, so padding lookups for every
+    edit on the same transcript are binary searches.
+
+    Args:
+        text: Text to scan
+
+    Returns:
+        Tuple of (starts, ends), the sorted start and end character indices
+        of every word
+    """
+    starts = []
+    ends = []
+    for match in _WORD_RE.finditer(text):
+        starts.append(match.start())
+        ends.append(match.end())
+    return starts, ends
+
+
+@lru_cache(maxsize=8)
+def _normalize_with_map(text: str) -> Tuple[str, List[int]]:
+    """Normalize text for matching and map it back to the original
+
+    Lowercases, drops punctuation and collapses whitespace runs to one space.
+    Results are cached, since the same transcript is searched for every edit.
+
+    Args:
+        text: Text to normalize
+
+    Returns:
+        Tuple of (normalized_text, norm_to_orig) where norm_to_orig[i] is the
+        index in text of the i-th normalized character
+    """
+    chars = []
+    norm_to_orig = []
+    pending_space = False
+
+    for i, char in enumerate(text):
+        if char.isspace():
+            pending_space = bool(chars)
+        elif char.isalnum():
+            if pending_space:
+                chars.append(" ")
+                norm_to_orig.append(i)
+                pending_space = False
+            # Lowercasing can expand a character, map all parts to it
+            for lower_char in char.lower():
+                chars.append(lower_char)
+                norm_to_orig.append(i)
+
+    return "".join(chars), norm_to_orig
+
+
+@dataclass(slots=True)
 class EditOperation:
     """Represents an edit operation
 
     Note: Pre-padding is text BEFORE the edit, post-padding is text AFTER the edit.
     Both are important for generating natural-sounding speech.
+
+    Uses slots, since operations are created per edit and kept in edit histories.
     """
 
     original_text: str
@@ -47,6 +590,14 @@ class SemanticEditor:
         tokenizer: AudioTokenizer,
         model_path: Optional[str] = None,
         load_llm: bool = True,
+        quality: str = "fast",
+        n_gpu_layers: Optional[int] = None,
+        n_ctx: int = 2048,
+        n_batch: int = 512,
+        n_threads: Optional[int] = None,
+        n_threads_batch: Optional[int] = None,
+        keep_llm_loaded: bool = False,
+        server_url: Optional[str] = None,
     ):
         """Initialize the semantic editor
 
@@ -54,12 +605,66 @@ class SemanticEditor:
             tokenizer: AudioTokenizer instance
             model_path: Path to the LLM model for editing
             load_llm: Whether to load the LLM model (can be set to False for manual edit mode)
+            quality: LLM preset used when no model_path is given ("fast" for
+                Llama 3.2 1B, "balanced" for Llama 3 8B Q4_K_M, "high" for Q8_0)
+            n_gpu_layers: Number of LLM layers to offload to the GPU (-1 for all,
+                None to offload all layers if a GPU is available)
+            n_ctx: LLM context size in tokens. The edit prompt is short, so a small
+                context keeps the KV cache allocation small.
+            n_batch: Maximum number of prompt tokens evaluated per batch
+            n_threads: Number of CPU threads for token generation (None for one
+                per physical core, or 4 when the LLM runs on the GPU)
+            n_threads_batch: Number of CPU threads for prompt evaluation (None for
+                all cores)
+            keep_llm_loaded: Keep the LLM loaded between edits instead of unloading it
+                after each one. Uses more memory, but skips reloading the model and
+                reuses the KV cache of the static prompt prefix.
+            server_url: Base URL of a llama.cpp server (llama-server) to query
+                instead of loading the LLM in this process (None to use the
+                LLM_SERVER_URL environment variable, if set)
         """
+        if quality not in _LLM_PRESETS:
+            raise ValueError(
+                f"Unknown quality '{quality}', expected one of {list(_LLM_PRESETS)}"
+            )
+
         self.tokenizer = tokenizer
-        self.model = None
+        self._model = None
         self.model_path = model_path
         self.should_load_llm = load_llm
-        # We'll lazy-load the model only when needed
+        self.quality = quality
+        self.n_gpu_layers = (
+            _default_gpu_layers() if n_gpu_layers is None else n_gpu_layers
+        )
+        self.n_ctx = n_ctx
+        self.n_batch = n_batch
+        # Token generation is memory bound, so hyperthreads only add contention.
+        # With the layers offloaded the CPU threads only drive sampling.
+        physical_cores = max(1, (os.cpu_count() or 2) // 2)
+        if n_threads is None:
+            n_threads = min(4, physical_cores) if self.n_gpu_layers else physical_cores
+        self.n_threads = n_threads
+        self.n_threads_batch = n_threads_batch or os.cpu_count() or 1
+        self.keep_llm_loaded = keep_llm_loaded
+        # With a server, the weights live in one llama-server process shared by
+        # all workers, which batches concurrent requests
+        self.server_url = server_url or os.environ.get("LLM_SERVER_URL") or None
+        # The model is loaded on first access of self.model, so sessions that
+        # only do manual edits never download or map the GGUF weights
+
+        # Tokenized static prompt prefix, built on model load
+        self._prefix_ids = None
+
+    @property
+    def model(self) -> Optional[Llama]:
+        """LLM used for semantic editing, loaded on first access
+
+        Returns:
+            Loaded LLM, or None if LLM loading is disabled
+        """
+        if self._model is None and self.should_load_llm and not self.server_url:
+            self._model = self._initialize_llm(self.model_path)
+        return self._model
 
     def _initialize_llm(self, model_path: Optional[str] = None) -> Llama:
         """Initialize the LLM for semantic editing
@@ -70,45 +675,100 @@ class SemanticEditor:
         Returns:
             Initialized LLM model
         """
-        if self.model is not None:
+        if self._model is not None:
             logger.info("LLM already loaded")
-            return self.model
+            return self._model
 
         # Log memory before loading
         MemoryManager.log_memory_stats("Before loading LLM")
 
-        # Default to a small model if none specified
+        # Default to the quality preset if no model specified
         if model_path is None:
-            model_path = "QuantFactory/Meta-Llama-3-8B-Instruct-GGUF"
-            filename = "*Q8_0.gguf"
+            model_path, filename = _LLM_PRESETS[self.quality]
         else:
             filename = None
 
-        logger.info(f"Initializing LLM for semantic editing: {model_path}")
-        model = Llama.from_pretrained(
+        # Import lazily: loading the llama.cpp shared library is only needed
+        # once an LLM is actually requested
+        from llama_cpp import Llama
+
+        load_args = dict(
             repo_id=model_path,
             filename=filename,
-            chat_format="chatml",
+            chat_format="llama-3",
             verbose=False,
-            n_gpu_layers=-1,  # Use GPU for all layers if available
+            n_gpu_layers=self.n_gpu_layers,
+            n_ctx=self.n_ctx,
+            n_batch=self.n_batch,
+            n_threads=self.n_threads,
+            n_threads_batch=self.n_threads_batch,
+            # Map the weights without pinning them, so the OS can share and
+            # evict pages of the GGUF file like any other cached file
+            use_mmap=True,
+            use_mlock=False,
+        )
+
+        # Editors that keep the model loaded share one instance per process;
+        # the others own theirs so unloading actually frees the memory
+        if self.keep_llm_loaded:
+            model = get_llm(**load_args)
+        else:
+            logger.info(f"Initializing LLM for semantic editing: {model_path}")
+            model = Llama.from_pretrained(**load_args)
+
+        # Tokenize the static prompt prefix once for this model
+        self._prefix_ids = model.tokenize(
+            _EDIT_PROMPT_PREFIX, add_bos=True, special=True
         )
 
+        # A model with an empty context was just loaded: put the prefix in its
+        # KV cache, so generation only evaluates the per-call suffix
+        if model.n_tokens == 0:
+            self._restore_prefix_state(model, tuple(load_args.items()))
+
         # Log memory after loading
         MemoryManager.log_memory_stats("After loading LLM")
 
         return model
 
+    def _restore_prefix_state(self, model: Llama, state_key: tuple):
+        """Load the KV cache of the static prompt prefix into a fresh model
+
+        The first load evaluates the prefix and snapshots the state; later loads
+        of the same model restore the snapshot instead of evaluating it again.
+
+        Args:
+            model: Freshly loaded LLM
+            state_key: Load arguments identifying the model
+        """
+        with _prefix_states_lock:
+            state = _prefix_states.get(state_key)
+            if state is None:
+                logger.info("Evaluating static prompt prefix")
+                model.eval(self._prefix_ids)
+                state = model.save_state()
+                # Keep only the logits of the last prefix token; load_state
+                # broadcasts them, and generation re-evaluates the last prompt
+                # token anyway. Saves a full vocabulary row per prefix token.
+                state.scores = state.scores[-1:]
+                _prefix_states[state_key] = state
+                return
+
+        logger.info("Restoring static prompt prefix state")
+        model.load_state(state)
+
     def _unload_llm(self):
         """Unload the LLM to free memory"""
-        if self.model is not None:
+        if self._model is not None:
             logger.info("Unloading LLM to free memory")
 
             # Log memory before unloading
             MemoryManager.log_memory_stats("Before unloading LLM")
 
             # Delete model reference
-            del self.model
-            self.model = None
+            del self._model
+            self._model = None
+            self._prefix_ids = None
 
             # Clear GPU memory
             MemoryManager.clear_gpu_memory()
@@ -128,42 +788,173 @@ class SemanticEditor:
         Returns:
             EditOperation with token range and edit details
         """
-        text = tokenized_audio.text
+        # Query LLM (or the proposal cache) to find what to replace
+        subseq_original, subseq_edited = self._propose_edit(
+            tokenized_audio.text, edit_prompt
+        )
+
+        # Unload LLM after use to free memory
+        if self.should_load_llm and not self.keep_llm_loaded:
+            self._unload_llm()
 
-        # Lazy-load LLM if needed
-        if self.should_load_llm and self.model is None:
-            self.model = self._initialize_llm(self.model_path)
+        return self._build_edit_operation(
+            tokenized_audio, subseq_original, subseq_edited
+        )
 
-        # Query LLM to find what to replace
-        subseq_original, subseq_edited = self._find_edit_substring(text, edit_prompt)
-        logger.info(f"Edit proposal: '{subseq_original}' -> '{subseq_edited}'")
+    def find_edit_regions(
+        self, tokenized_audio: TokenizedAudio, edit_prompts: List[str]
+    ) -> List[EditOperation]:
+        """Find the token ranges to edit for several prompts on the same audio
 
-        # Unload LLM after use to free memory
-        if self.should_load_llm:
+        The LLM is loaded once for the whole batch and all uncached prompts are
+        answered by a single completion returning a JSON array, so the prompt
+        prefix and original message are only evaluated once. If that answer
+        cannot be used, each prompt is queried on its own, reusing the KV cache
+        of the shared prefix.
+
+        Args:
+            tokenized_audio: TokenizedAudio object
+            edit_prompts: Descriptions of the edits to make
+
+        Returns:
+            List of EditOperations, one per edit prompt, in the same order
+        """
+        if not edit_prompts:
+            return []
+
+        text = tokenized_audio.text
+
+        # Serve what we can from the proposal cache
+        cache_keys = [
+            self._proposal_cache_key(text, edit_prompt) for edit_prompt in edit_prompts
+        ]
+        proposals = [_get_cached_proposal(cache_key) for cache_key in cache_keys]
+        missing = [i for i, proposal in enumerate(proposals) if proposal is None]
+
+        # Query LLM once for all remaining prompts
+        if len(missing) > 1:
+            batch = self._find_edit_substrings(text, [edit_prompts[i] for i in missing])
+            if batch is not None:
+                for i, proposal in zip(missing, batch):
+                    logger.info("Edit proposal: '{}' -> '{}'", *proposal)
+                    _cache_proposal(cache_keys[i], proposal)
+                    proposals[i] = proposal
+
+        # Fall back to one query per prompt for anything still missing
+        for i, proposal in enumerate(proposals):
+            if proposal is None:
+                proposals[i] = self._propose_edit(text, edit_prompts[i])
+
+        # Unload LLM once after the whole batch
+        if self.should_load_llm and not self.keep_llm_loaded:
             self._unload_llm()
 
+        return [
+            self._build_edit_operation(tokenized_audio, subseq_original, subseq_edited)
+            for subseq_original, subseq_edited in proposals
+        ]
+
+    def _proposal_cache_key(self, text: str, edit_prompt: str) -> str:
+        """Build the proposal cache key for a message and edit prompt
+
+        Args:
+            text: Original message
+            edit_prompt: Description of the edit to make
+
+        Returns:
+            Hex digest identifying model, prompt template, message and prompt
+        """
+        # Key on the model and prompt template as well, so switching models or
+        # changing the prompt never serves stale (persisted) entries
+        model_id = (
+            self.server_url or self.model_path or ":".join(_LLM_PRESETS[self.quality])
+        )
+        key_parts = (model_id, text, edit_prompt)
+        digest = hashlib.sha256(_EDIT_PROMPT_PREFIX + _EDIT_PROMPT_SUFFIX)
+        digest.update("\x00".join(key_parts).encode("utf-8"))
+        return digest.hexdigest()
+
+    def _propose_edit(self, text: str, edit_prompt: str) -> Tuple[str, str]:
+        """Get the LLM edit proposal for a prompt, using the proposal cache
+
+        Loads the LLM on a cache miss but leaves unloading to the caller.
+
+        Args:
+            text: Original message
+            edit_prompt: Description of the edit to make
+
+        Returns:
+            Tuple of (subseq_original, subseq_edited)
+        """
+        cache_key = self._proposal_cache_key(text, edit_prompt)
+        proposal = _get_cached_proposal(cache_key)
+
+        if proposal is not None:
+            logger.info("Using cached edit proposal")
+        else:
+            # _find_edit_substring loads the LLM on first use
+            proposal = self._find_edit_substring(text, edit_prompt)
+            _cache_proposal(cache_key, proposal)
+
+        # Pass arguments to loguru instead of f-strings so disabled levels skip
+        # formatting the (possibly long) texts entirely
+        logger.info("Edit proposal: '{}' -> '{}'", *proposal)
+
+        return proposal
+
+    def _build_edit_operation(
+        self,
+        tokenized_audio: TokenizedAudio,
+        subseq_original: str,
+        subseq_edited: str,
+    ) -> EditOperation:
+        """Map an LLM edit proposal onto token ranges and padding context
+
+        Args:
+            tokenized_audio: TokenizedAudio object
+            subseq_original: Text in the transcript to be replaced
+            subseq_edited: Text to replace it with
+
+        Returns:
+            EditOperation with token range and edit details
+        """
+        text = tokenized_audio.text
+
         # Find the token range for the edit
         # First locate the text indices
         try:
             start_char_idx = text.index(subseq_original)
             end_char_idx = start_char_idx + len(subseq_original)
         except ValueError:
-            logger.warning(
-                f"Could not find '{subseq_original}' in text, using fuzzy matching"
-            )
-            start_char_idx, end_char_idx = self._fuzzy_find_substring(
-                text, subseq_original
-            )
+            # The LLM often changes case, whitespace or punctuation, so retry
+            # on normalized text before resorting to fuzzy matching
+            match = self._normalized_find_substring(text, subseq_original)
+            if match is not None:
+                start_char_idx, end_char_idx = match
+            else:
+                logger.warning(
+                    "Could not find '{}' in text, using fuzzy matching",
+                    subseq_original,
+                )
+                start_char_idx, end_char_idx = self._fuzzy_find_substring(
+                    text, subseq_original
+                )
 
         # Now map the character indices to token indices
         start_token_idx, end_token_idx = self.tokenizer.find_token_range(
             tokenized_audio, (start_char_idx, end_char_idx)
         )
 
-        # Find appropriate pre-padding context (text BEFORE the edit)
-        prepadding_text, prepadding_start_char_idx = self.find_prepadding_context(
-            text, start_char_idx
-        )
+        # Find pre-padding (text BEFORE the edit) and post-padding (text AFTER
+        # the edit) context together, walking outward from the edit once per side
+        (
+            prepadding_start_char_idx,
+            prepadding_end_char_idx,
+            postpadding_start_char_idx,
+            postpadding_end_char_idx,
+        ) = self._compute_context_spans(text, start_char_idx, end_char_idx)
+        prepadding_text = text[prepadding_start_char_idx:prepadding_end_char_idx]
+        postpadding_text = text[postpadding_start_char_idx:postpadding_end_char_idx]
 
         # Map prepadding character indices to token indices
         prepadding_start_token_idx, prepadding_end_token_idx = -1, -1
@@ -177,15 +968,12 @@ class SemanticEditor:
             prepadding_end_token_idx = start_token_idx
 
             logger.info(
-                f"Pre-padding context (before edit): '{prepadding_text}' "
-                f"(tokens {prepadding_start_token_idx} to {prepadding_end_token_idx})"
+                "Pre-padding context (before edit): '{}' (tokens {} to {})",
+                prepadding_text,
+                prepadding_start_token_idx,
+                prepadding_end_token_idx,
             )
 
-        # Find appropriate post-padding context (text AFTER the edit)
-        postpadding_text, postpadding_end_char_idx = self.find_postpadding_context(
-            text, end_char_idx
-        )
-
         # Map postpadding character indices to token indices
         postpadding_start_token_idx, postpadding_end_token_idx = -1, -1
         if postpadding_text:
@@ -198,8 +986,10 @@ class SemanticEditor:
             postpadding_start_token_idx = end_token_idx
 
             logger.info(
-                f"Post-padding context (after edit): '{postpadding_text}' "
-                f"(tokens {postpadding_start_token_idx} to {postpadding_end_token_idx})"
+                "Post-padding context (after edit): '{}' (tokens {} to {})",
+                postpadding_text,
+                postpadding_start_token_idx,
+                postpadding_end_token_idx,
             )
 
         # Handle edge cases for edit operations
@@ -207,12 +997,12 @@ class SemanticEditor:
         if not subseq_original.strip():
             # For insertion, end_token_idx should equal start_token_idx
             end_token_idx = start_token_idx
-            logger.info(f"Edit is an insertion at token {start_token_idx}")
+            logger.info("Edit is an insertion at token {}", start_token_idx)
 
         # If edited text is empty (deletion), make sure we have proper token range
         if not subseq_edited.strip():
             logger.info(
-                f"Edit is a deletion of tokens {start_token_idx} to {end_token_idx}"
+                "Edit is a deletion of tokens {} to {}", start_token_idx, end_token_idx
             )
 
         # Create the EditOperation with proper pre-padding and post-padding
@@ -242,50 +1032,10 @@ class SemanticEditor:
             subseq_original: minimal subsequence in the original message that needs to be replaced
             subseq_edited: text to replace the subsequence with
         """
-        if self.model is None:
-            logger.error("LLM model not loaded but _find_edit_substring was called")
-            raise ValueError("Cannot find edit substring: LLM model not loaded")
-
-        prompt = (
-            f"Given an original message and an edit prompt. Identify the minimal subsequence in the original message `subseq_original` that needs to be replaced and text `subseq_edited` to replace `subseq_original` with.\n"
-            "Make sure that subseq_original is a contiguous substring of the original message.\n"
-            "Make sure that the message resulting from replacing subseq_original in the original message with subseq_edited is syntactically and semantically correct.\n\n"
-            "Example:\n"
-            "Original Message: 'The quick brown fox jumps over the lazy dog.'\n"
-            "Edit Prompt: 'Turn the fox into a funny yellow cow'\n"
-            "Note: The subsequence 'fox' in the original message needs to be replaced with 'funny yellow cow' to facilitate the change.\n\n"
-            "JSON Output: {'subseq_original': 'fox', 'subseq_edited': 'funny yellow cow'}\n\n"
-            "Example:\n"
-            f"Original Message: '{text}'\n"
-            f"Edit Prompt: '{query}'\n"
-        )
-
-        # Use response format to enforce JSON output with specific schema
-        output = self.model.create_chat_completion(
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are a helpful assistant that outputs in JSON.",
-                },
-                {"role": "user", "content": prompt},
-            ],
-            response_format={
-                "type": "json_object",
-                "schema": {
-                    "type": "object",
-                    "properties": {
-                        "subseq_original": {"type": "string"},
-                        "subseq_edited": {"type": "string"},
-                    },
-                    "required": ["subseq_original", "subseq_edited"],
-                },
-            },
-            temperature=0.7,
-        )
+        suffix = _EDIT_PROMPT_SUFFIX % (text.encode("utf-8"), query.encode("utf-8"))
 
         try:
-            result = output["choices"][0]["message"]["content"]
-            result = json.loads(result)
+            result = json_loads(self._complete(suffix))
             return result["subseq_original"], result["subseq_edited"]
         except json.JSONDecodeError:
             logger.error("Error parsing LLM response")
@@ -296,6 +1046,121 @@ class SemanticEditor:
                 "Expected keys `subseq_original` and `subseq_edited` are missing."
             )
 
+    def _find_edit_substrings(
+        self, text: str, queries: List[str]
+    ) -> Optional[List[Tuple[str, str]]]:
+        """Queries LLM once for the edit substrings of several edit prompts.
+
+        Args:
+            text: original message
+            queries: edit prompts
+
+        Returns:
+            List of (subseq_original, subseq_edited), one per edit prompt, or None
+            if the response could not be parsed into one answer per prompt
+        """
+        numbered_queries = b"".join(
+            b"%d. '%s'\n" % (i + 1, query.encode("utf-8"))
+            for i, query in enumerate(queries)
+        )
+        suffix = _EDIT_PROMPT_BATCH_SUFFIX % (text.encode("utf-8"), numbered_queries)
+
+        try:
+            # The array grammar allows exactly one object per prompt
+            results = json_loads(self._complete(suffix, len(queries)))
+            proposals = [
+                (result["subseq_original"], result["subseq_edited"])
+                for result in results
+            ]
+        except (json.JSONDecodeError, KeyError, TypeError):
+            logger.warning("Could not parse batched LLM response")
+            return None
+
+        if len(proposals) != len(queries):
+            logger.warning(
+                "Batched LLM response has {} answers for {} edit prompts",
+                len(proposals),
+                len(queries),
+            )
+            return None
+
+        return proposals
+
+    def _complete(self, suffix: bytes, count: int = 0) -> str:
+        """Run a grammar-constrained completion of the static prefix and a suffix
+
+        Args:
+            suffix: Per-call part of the prompt, UTF-8 encoded
+            count: Number of proposals in a JSON array, or 0 for a single object
+
+        Returns:
+            JSON text of the answer
+        """
+        if self.server_url:
+            return self._server_complete(suffix, count)
+
+        model = self.model
+        if model is None:
+            logger.error("LLM loading disabled but an edit substring was requested")
+            raise ValueError("Cannot find edit substring: LLM model not loaded")
+
+        # Only the per-call suffix needs tokenizing; the static prefix is cached
+        suffix_ids = model.tokenize(suffix, add_bos=False, special=True)
+
+        # Run a raw completion on the pre-tokenized prompt, skipping chat
+        # template rendering. The grammar enforces JSON output with our schema.
+        # Stream it so decoding stops as soon as the JSON value is closed.
+        # Decoding is greedy and capped: each answer is a short JSON object whose
+        # strings are bounded by the length of the message and edit prompt.
+        chunks = model(
+            self._prefix_ids + suffix_ids,
+            max_tokens=max(1, count) * max(128, len(suffix_ids)),
+            temperature=0.0,
+            top_p=1.0,
+            stop=["\n\n"],
+            grammar=_edit_grammar(count),
+            stream=True,
+        )
+        return _read_json_value(chunks)
+
+    def _server_complete(self, suffix: bytes, count: int = 0) -> str:
+        """Run the completion on a llama.cpp server
+
+        Uses the native /completion endpoint, which accepts the raw prompt with
+        special tokens and a GBNF grammar. With cache_prompt the server keeps
+        the KV cache of the static prefix between requests.
+
+        Args:
+            suffix: Per-call part of the prompt, UTF-8 encoded
+            count: Number of proposals in a JSON array, or 0 for a single object
+
+        Returns:
+            JSON text of the answer
+        """
+        payload = {
+            "prompt": (_EDIT_PROMPT_PREFIX + suffix).decode("utf-8"),
+            # The suffix length in bytes bounds its length in tokens
+            "n_predict": max(1, count) * max(128, len(suffix)),
+            "temperature": 0.0,
+            "top_p": 1.0,
+            "stop": ["\n\n"],
+            "grammar": _edit_grammar_text(count),
+            "cache_prompt": True,
+        }
+        request = urllib.request.Request(
+            self.server_url.rstrip("/") + "/completion",
+            data=json.dumps(payload).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+        )
+
+        try:
+            with urllib.request.urlopen(request, timeout=120) as response:
+                return json_loads(response.read())["content"]
+        # URLError and read timeouts are OSErrors, a non-JSON body a ValueError
+        except (OSError, ValueError, KeyError) as e:
+            logger.error(f"LLM server request failed: {e}")
+            raise RuntimeError(f"LLM server request failed: {e}")
+
     def find_prepadding_context(
         self, text: str, edit_start_char_idx: int
     ) -> Tuple[str, int]:
@@ -309,70 +1174,8 @@ class SemanticEditor:
         Returns:
             Tuple of (prepadding_text, prepadding_start_char_idx)
         """
-        # Get text BEFORE the edit point (not after)
-        text_before = text[:edit_start_char_idx].strip()
-
-        if not text_before:
-            # No text before the edit point
-            return "", 0
-
-        # Define patterns for sentence boundaries (periods, question marks, exclamation points)
-        sentence_boundaries = [". ", "? ", "! ", "\n"]
-
-        # Find the last sentence boundary
-        last_boundary_idx = -1
-        for boundary in sentence_boundaries:
-            idx = text_before.rfind(boundary)
-            if idx > last_boundary_idx:
-                last_boundary_idx = idx
-
-        if last_boundary_idx != -1:
-            # Found a sentence boundary, use everything after it as context
-            # Add the length of the boundary itself (e.g., ". " is 2 chars)
-            boundary_length = 1
-            if (
-                text_before[last_boundary_idx : last_boundary_idx + 2].rstrip()
-                in sentence_boundaries
-            ):
-                boundary_length = 2
-
-            prepadding_start_idx = last_boundary_idx + boundary_length
-            prepadding_text = text_before[prepadding_start_idx:]
-
-            # Calculate the actual character index in the original text
-            actual_start_idx = (
-                edit_start_char_idx - len(text_before) + prepadding_start_idx
-            )
-
-            return prepadding_text, actual_start_idx
-        else:
-            # No sentence boundary found, use the last few words for context
-            words = text_before.split()
-            if len(words) <= 5:
-                # Use all words if there are 5 or fewer
-                return text_before, edit_start_char_idx - len(text_before)
-            else:
-                # Use the last 5 words as context
-                context_words = words[-5:]
-
-                # Find where these words start in the original text
-                context_start_idx = text_before.rfind(" " + context_words[0] + " ")
-                if context_start_idx == -1:
-                    # If not found with spaces, try just finding the first word
-                    context_start_idx = text_before.rfind(context_words[0])
-                    if context_start_idx == -1:
-                        # If still not found, just use a fixed character count
-                        return text_before[-40:], max(0, edit_start_char_idx - 40)
-
-                # Add 1 to skip the leading space if found with space
-                if text_before[context_start_idx] == " ":
-                    context_start_idx += 1
-
-                # Calculate the actual character index in the original text
-                actual_start_idx = (
-                    edit_start_char_idx - len(text_before) + context_start_idx
-                )
-                return text_before[context_start_idx:], actual_start_idx
+        start, end = self._prepadding_span(text, edit_start_char_idx)
+        return text[start:end], start
 
     def find_postpadding_context(
         self, text: str, edit_end_char_idx: int
@@ -387,56 +1190,185 @@ class SemanticEditor:
         Returns:
             Tuple of (postpadding_text, postpadding_end_char_idx)
         """
-        # Get text AFTER the edit point (not before)
-        text_after = text[edit_end_char_idx:].strip()
+        start, end = self._postpadding_span(text, edit_end_char_idx)
+        return text[start:end], end
 
-        if not text_after:
-            # No text after the edit point
-            return "", len(text)
+    def _compute_context_spans(
+        self, text: str, edit_start_char_idx: int, edit_end_char_idx: int
+    ) -> Tuple[int, int, int, int]:
+        """Compute the pre-padding and post-padding character spans of an edit.
 
-        # Define patterns for sentence boundaries (periods, question marks, exclamation points)
-        sentence_boundaries = [". ", "? ", "! ", "\n"]
+        Args:
+            text: Full transcript text
+            edit_start_char_idx: Character index where the edit starts
+            edit_end_char_idx: Character index where the edit ends
+
+        Returns:
+            Tuple of (prepadding_start, prepadding_end, postpadding_start, postpadding_end)
+            character indices. A side without context has an empty span.
+        """
+        prepadding_start, prepadding_end = self._prepadding_span(
+            text, edit_start_char_idx
+        )
+        postpadding_start, postpadding_end = self._postpadding_span(
+            text, edit_end_char_idx
+        )
+        return prepadding_start, prepadding_end, postpadding_start, postpadding_end
+
+    def _prepadding_span(self, text: str, edit_start_char_idx: int) -> Tuple[int, int]:
+        """Find the character span of the pre-padding context.
+
+        The span covers the text between the last sentence boundary and the edit,
+        or the last few words before the edit if there is no boundary. Surrounding
+        whitespace is excluded. Works on indices only, without copying the text.
+
+        Args:
+            text: Full transcript text
+            edit_start_char_idx: Character index where the edit starts
+
+        Returns:
+            Tuple of (start_char_idx, end_char_idx) in the original text
+        """
+        # Skip whitespace directly before the edit
+        end = edit_start_char_idx
+        while end > 0 and text[end - 1].isspace():
+            end -= 1
+
+        if end == 0:
+            # No text before the edit point
+            return 0, 0
+
+        # Find the last sentence boundary before the edit
+        _, boundary_ends = _boundary_positions(text)
+        boundary_idx = bisect.bisect_right(boundary_ends, end) - 1
+
+        if boundary_idx >= 0:
+            # Use everything after the boundary as context
+            start = boundary_ends[boundary_idx]
+        else:
+            # No sentence boundary found, start at the last few words. The word
+            # that ends at the edit counts as the first of them.
+            word_starts, _ = _word_positions(text)
+            last_word_idx = bisect.bisect_left(word_starts, end) - 1
+            start = word_starts[max(0, last_word_idx - _CONTEXT_WORDS + 1)]
+
+        # Skip whitespace at the start of the context
+        while start < end and text[start].isspace():
+            start += 1
+
+        return start, end
+
+    def _postpadding_span(self, text: str, edit_end_char_idx: int) -> Tuple[int, int]:
+        """Find the character span of the post-padding context.
+
+        The span covers the text from the edit up to and including the next
+        sentence boundary, or the first few words after the edit if there is no
+        boundary. Surrounding whitespace is excluded. Works on indices only,
+        without copying the text.
+
+        Args:
+            text: Full transcript text
+            edit_end_char_idx: Character index where the edit ends
+
+        Returns:
+            Tuple of (start_char_idx, end_char_idx) in the original text
+        """
+        text_length = len(text)
+
+        # Skip whitespace directly after the edit
+        start = edit_end_char_idx
+        while start < text_length and text[start].isspace():
+            start += 1
+
+        if start >= text_length:
+            # No text after the edit point
+            return text_length, text_length
 
         # Find the first sentence boundary after the edit
-        first_boundary_idx = len(text_after)
-        for boundary in sentence_boundaries:
-            idx = text_after.find(boundary)
-            if idx != -1 and idx < first_boundary_idx:
-                first_boundary_idx = idx
-
-        if first_boundary_idx < len(text_after):
-            # Found a sentence boundary, use everything up to it as context
-            # Add the length of the boundary itself (e.g., ". " is 2 chars)
-            boundary_length = 1
-            if (
-                text_after[first_boundary_idx : first_boundary_idx + 2].rstrip()
-                in sentence_boundaries
-            ):
-                boundary_length = 2
-
-            postpadding_text = text_after[: first_boundary_idx + boundary_length]
-
-            # Calculate the actual character index in the original text
-            actual_end_idx = edit_end_char_idx + first_boundary_idx + boundary_length
-
-            return postpadding_text, actual_end_idx
+        boundary_starts, _ = _boundary_positions(text)
+        boundary_idx = bisect.bisect_left(boundary_starts, start)
+
+        if boundary_idx < len(boundary_starts):
+            # Use everything up to and including the boundary punctuation
+            end = boundary_starts[boundary_idx] + 1
         else:
-            # No sentence boundary found, use the first few words for context
-            words = text_after.split()
-            if len(words) <= 5:
-                # Use all words if there are 5 or fewer
-                return text_after, edit_end_char_idx + len(text_after)
-            else:
-                # Use the first 5 words as context
-                context_words = words[:5]
-                context_end_idx = 0
-                for word in context_words:
-                    context_end_idx = text_after.find(word, context_end_idx) + len(word)
+            # No sentence boundary found, end after the first few words. The
+            # word containing the start counts as the first of them.
+            word_starts, word_ends = _word_positions(text)
+            first_word_idx = bisect.bisect_right(word_ends, start)
+            end = word_ends[
+                min(len(word_ends) - 1, first_word_idx + _CONTEXT_WORDS - 1)
+            ]
+
+        # Skip whitespace at the end of the context
+        while end > start and text[end - 1].isspace():
+            end -= 1
+
+        return start, end
+
+    def _normalized_find_substring(
+        self, text: str, substring: str
+    ) -> Optional[Tuple[int, int]]:
+        """Find a substring ignoring case, punctuation and whitespace differences
+
+        Args:
+            text: Text to search in
+            substring: Substring to search for
+
+        Returns:
+            Tuple of (start_idx, end_idx) in the original text, or None if the
+            normalized substring does not occur in the normalized text
+        """
+        normalized_substring, _ = _normalize_with_map(substring)
+        if not normalized_substring:
+            return None
 
-                # Calculate the actual character index in the original text
-                actual_end_idx = edit_end_char_idx + context_end_idx
+        normalized_text, norm_to_orig = _normalize_with_map(text)
+        pos = normalized_text.find(normalized_substring)
+        if pos == -1:
+            return None
 
-                return " ".join(context_words), actual_end_idx
+        # Map the first and last matched characters back to the original text
+        start_idx = norm_to_orig[pos]
+        end_idx = norm_to_orig[pos + len(normalized_substring) - 1] + 1
+        return start_idx, end_idx
+
+    def _anchor_find_substring(
+        self, text: str, substring: str
+    ) -> Optional[Tuple[int, int]]:
+        """Find a substring by locating its first and last words in the text
+
+        Args:
+            text: Text to search in
+            substring: Substring to search for
+
+        Returns:
+            Tuple of (start_idx, end_idx) spanning from the first to the last word,
+            or None if either word is missing or the span is implausibly long
+        """
+        words = substring.split()
+        if not words:
+            return None
+
+        first_word, last_word = words[0], words[-1]
+        start_idx = text.find(first_word)
+        if start_idx == -1:
+            return None
+
+        # The last word must come after the first one
+        last_idx = start_idx if len(words) == 1 else start_idx + len(first_word)
+        last_idx = text.find(last_word, last_idx)
+        if last_idx == -1:
+            return None
+
+        end_idx = last_idx + len(last_word)
+
+        # Reject spans much longer than the substring; the anchors likely
+        # matched unrelated occurrences
+        if end_idx - start_idx > 2 * len(substring):
+            return None
+
+        return start_idx, end_idx
 
     def _fuzzy_find_substring(self, text: str, substring: str) -> Tuple[int, int]:
         """Find the best match for a substring using fuzzy matching
@@ -448,19 +1380,60 @@ class SemanticEditor:
         Returns:
             Tuple of (start_idx, end_idx)
         """
-        from difflib import SequenceMatcher
+        # The LLM usually returns an exact substring, so try a plain find first
+        exact_idx = text.find(substring)
+        if exact_idx != -1:
+            return exact_idx, exact_idx + len(substring)
 
-        # Try different positions and find the best match
         best_ratio = 0
         best_pos = (0, len(substring))
 
-        for i in range(len(text) - len(substring) + 1):
-            test_str = text[i : i + len(substring)]
-            ratio = SequenceMatcher(None, test_str, substring).ratio()
+        if not substring or len(substring) > len(text):
+            logger.warning("Substring cannot be matched against the text")
+            return best_pos
 
-            if ratio > best_ratio:
-                best_ratio = ratio
-                best_pos = (i, i + len(substring))
+        try:
+            from rapidfuzz import fuzz
+        except ImportError:
+            fuzz = None
+
+        if fuzz is not None:
+            # Find the best aligned window in a single native call
+            alignment = fuzz.partial_ratio_alignment(substring, text)
+            best_ratio = alignment.score / 100
+            best_pos = (alignment.dest_start, alignment.dest_end)
+        else:
+            # Without rapidfuzz, first try anchoring on the first and last words,
+            # which covers the common case of the LLM changing a word in between
+            anchored_pos = self._anchor_find_substring(text, substring)
+            if anchored_pos is not None:
+                return anchored_pos
+
+            kernel = _get_fuzzy_kernel()
+            if kernel is not None:
+                # Score all windows in native code. UTF-32 gives one array
+                # element per character, so window offsets are character indices.
+                text_arr = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+                pattern_arr = np.frombuffer(
+                    substring.encode("utf-32-le"), dtype=np.uint32
+                )
+                band = max(1, len(substring) // 3)
+                distances = kernel(text_arr, pattern_arr, band)
+
+                best_idx = int(np.argmin(distances))
+                best_ratio = max(0.0, 1.0 - distances[best_idx] / len(substring))
+                best_pos = (best_idx, best_idx + len(substring))
+            else:
+                # Prefilter all windows with NumPy, then score only the few
+                # best candidates exactly in Python
+                m = len(substring)
+                candidates = _histogram_candidates(text, substring, _FUZZY_CANDIDATES)
+                best_distance, best_idx = min(
+                    (_levenshtein(text[idx : idx + m], substring), int(idx))
+                    for idx in candidates
+                )
+                best_ratio = max(0.0, 1.0 - best_distance / m)
+                best_pos = (best_idx, best_idx + m)
 
         if best_ratio < 0.7:
             logger.warning(f"Low confidence fuzzy match: {best_ratio:.2f}")
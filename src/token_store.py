@@ -1,13 +1,16 @@
-import json
+import bisect
 import uuid
 import torch
-import torchaudio
+import soundfile as sf
 import os
 import time
 import tempfile
-from dataclasses import dataclass, field, asdict
+import threading
+import functools
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
 from typing import List, Dict, Tuple, Optional, Union, Any
-from copy import deepcopy
 from pathlib import Path
 from loguru import logger
 
@@ -15,28 +18,288 @@ from src.tokenization import TokenizedAudio, AudioTokenizer
 from src.semantic_edit import EditOperation
 from src.integrated_inpainting import IntegratedVoiceInpainting
 from src.memory_manager import MemoryManager
+from src.audio_utils import to_device_async
 
 
-@dataclass
+# Scale between float audio in [-1, 1] and 16-bit PCM
+_PCM16_SCALE = 32767.0
+
+# Upper bound on memoized token range texts per store
+_TEXT_RANGE_CACHE_SIZE = 512
+
+# Edits between emptying the CUDA cache. Emptying it after every edit would
+# pay for cudaFree/cudaMalloc on each one.
+_EDITS_PER_CACHE_CLEAR = 8
+
+# Versions whose token data is kept in memory; older ones are spilled to disk
+MAX_LIVE_VERSIONS = 10
+
+# Every this many versions the full tensors are stored; versions in between
+# only store a patch against the previous version
+_CHECKPOINT_INTERVAL = 10
+
+
+def _quantize_audio(audio):
+    """Quantize float audio to 16-bit PCM for archiving in version history
+
+    Args:
+        audio: Float audio tensor with samples in [-1, 1]
+
+    Returns:
+        int16 audio tensor (half the memory of float32)
+    """
+    if audio is None or audio.dtype == torch.int16:
+        return audio
+    return (audio.clamp(-1.0, 1.0) * _PCM16_SCALE).round().to(torch.int16)
+
+
+def _dequantize_audio(audio):
+    """Convert archived 16-bit PCM audio back to float32
+
+    Args:
+        audio: int16 audio tensor
+
+    Returns:
+        float32 audio tensor with samples in [-1, 1]
+    """
+    if audio is None or audio.dtype != torch.int16:
+        return audio
+    return audio.to(torch.float32) / _PCM16_SCALE
+
+
+def _to_host(tensor):
+    """Move an archived tensor off the GPU into pinned host memory
+
+    Pinned memory lets restore_version copy it back asynchronously.
+
+    Args:
+        tensor: Tensor to archive (may be None)
+
+    Returns:
+        Tensor in host memory
+    """
+    if tensor is None or tensor.device.type == "cpu":
+        return tensor
+    tensor = tensor.detach().cpu()
+    if torch.cuda.is_available():
+        tensor = tensor.pin_memory()
+    return tensor
+
+
+def _write_audio(audio, sample_rate, save_path):
+    """Write an audio tensor to a 16-bit PCM WAV file
+
+    Args:
+        audio: Audio tensor of shape (num_samples,) or (channels, num_samples)
+        sample_rate: Sample rate
+        save_path: Path of the WAV file
+    """
+    # Quantize to 16-bit PCM where the tensor lives, which halves the bytes
+    # copied off the GPU, then write the samples straight from a NumPy view.
+    # Only copy to the host if the tensor is not already there.
+    audio = _quantize_audio(audio)
+    if audio.device.type != "cpu":
+        audio = audio.cpu()
+    audio_np = audio.numpy()
+
+    # soundfile expects (frames, channels)
+    if audio_np.ndim == 2:
+        audio_np = audio_np.T
+
+    sf.write(save_path, audio_np, sample_rate, subtype="PCM_16")
+
+
+def _snapshot_state(state, audio):
+    """Copy a TokenizedAudio for the version history without cloning tensors
+
+    Tensors (audio, RVQ and semantic tokens) are shared by reference. This is safe because
+    edits always assign new tensors to the working state and never modify one
+    in place. Only the mutable containers get a shallow copy, so a snapshot
+    costs O(metadata) instead of O(audio).
+
+    Args:
+        state: TokenizedAudio to snapshot
+        audio: Audio tensor to store in the snapshot
+
+    Returns:
+        New TokenizedAudio sharing the tensors of the given state
+    """
+
+    def shallow_copy(value):
+        return None if value is None else value.copy()
+
+    return replace(
+        state,
+        audio=audio,
+        segments=shallow_copy(state.segments),
+        text_to_token_map=shallow_copy(state.text_to_token_map),
+        token_to_text_map=shallow_copy(state.token_to_text_map),
+        word_timestamps=shallow_copy(state.word_timestamps),
+        llama_tokens=shallow_copy(state.llama_tokens),
+        semantic_to_rvq_map=shallow_copy(state.semantic_to_rvq_map),
+    )
+
+
+def _synchronized(method):
+    """Run a TokenStore method while holding that store's lock
+
+    Serializes mutations of one session, and the accessors that read several
+    of its fields, without blocking other sessions.
+    """
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            self.last_accessed = time.time()
+            return method(self, *args, **kwargs)
+
+    return wrapper
+
+
+@dataclass(slots=True)
+class TensorPatch:
+    """Difference between two tensors along their last (time) dimension
+
+    Stores only the span that differs between a base tensor and a new one: the
+    new tensor is the base's first prefix_len steps, then middle, then the
+    base's last suffix_len steps.
+    """
+
+    prefix_len: int
+    suffix_len: int
+    middle: torch.Tensor
+
+    @classmethod
+    def between(cls, base, new):
+        """Compute the patch that turns base into new
+
+        Args:
+            base: Base tensor (may be None)
+            new: New tensor (may be None)
+
+        Returns:
+            TensorPatch, or None if new is None
+        """
+        if new is None:
+            return None
+        if base is None or base.shape[:-1] != new.shape[:-1] or base.dtype != new.dtype:
+            return cls(0, 0, new)
+
+        # Length of the common prefix, compared over all leading dimensions
+        n = min(base.shape[-1], new.shape[-1])
+        prefix_len = n
+        if n:
+            equal = (base[..., :n] == new[..., :n]).reshape(-1, n).all(dim=0)
+            mismatch = (~equal).nonzero()
+            if len(mismatch):
+                prefix_len = mismatch[0].item()
+
+        # Length of the common suffix within what the prefix left over
+        m = n - prefix_len
+        suffix_len = m
+        if m:
+            equal = (
+                (base[..., base.shape[-1] - m :] == new[..., new.shape[-1] - m :])
+                .reshape(-1, m)
+                .all(dim=0)
+            )
+            mismatch = (~equal).nonzero()
+            if len(mismatch):
+                suffix_len = m - 1 - mismatch[-1].item()
+
+        # Clone, so the patch does not keep the whole new tensor alive
+        middle = new[..., prefix_len : new.shape[-1] - suffix_len].clone()
+        return cls(prefix_len, suffix_len, middle)
+
+    def apply(self, base):
+        """Rebuild the new tensor from the base tensor
+
+        Args:
+            base: Base tensor the patch was computed against (may be None)
+
+        Returns:
+            Patched tensor
+        """
+        if base is None:
+            return self.middle
+        return torch.cat(
+            [
+                base[..., : self.prefix_len],
+                self.middle,
+                base[..., base.shape[-1] - self.suffix_len :],
+            ],
+            dim=-1,
+        )
+
+
+@dataclass(slots=True)
+class TokenStoreVersionDiff:
+    """Tensors of a version stored as patches against the previous version
+
+    An edit only regenerates a short span of audio and tokens, so the patches
+    are a small fraction of the full tensors.
+    """
+
+    base_version_id: str
+    audio_patch: Optional[TensorPatch]
+    token_patch: Optional[TensorPatch]
+
+
+@dataclass(slots=True)
 class TokenStoreVersion:
-    """Represents a version of the token state with metadata"""
+    """Represents a version of the token state with metadata
+
+    Uses slots, since a session can accumulate many versions.
+    """
 
     # Version metadata
     id: str
     label: str
     timestamp: float  # Unix timestamp
 
-    # Token data
-    token_data: TokenizedAudio
+    # Token data (None while spilled to disk). Versions stored as a diff keep
+    # their metadata here, with the audio and RVQ tokens left as None.
+    token_data: Optional[TokenizedAudio]
+
+    # Patches against the previous version, or None if the tensors are stored
+    # in full
+    diff: Optional[TokenStoreVersionDiff] = None
 
     # Audio path for persistence
     audio_path: Optional[str] = None
 
+    # File holding the token data once the version is spilled to disk
+    spill_path: Optional[str] = None
+
     # Edit metadata
     edit_description: str = ""
     modified_token_indices: List[int] = field(default_factory=list)
     generated_regions: List[Dict] = field(default_factory=list)
 
+    def to_dict(self, index, is_current):
+        """Get lightweight version metadata without the token data
+
+        Builds the dict directly instead of using dataclasses.asdict, which
+        would recursively copy the full token data.
+
+        Args:
+            index: Index of this version in the history
+            is_current: Whether this is the current version
+
+        Returns:
+            Dictionary of version metadata
+        """
+        return {
+            "id": self.id,
+            "label": self.label,
+            "timestamp": self.timestamp,
+            "edit_description": self.edit_description,
+            "modified_token_indices": self.modified_token_indices,
+            "generated_regions": self.generated_regions,
+            "index": index,
+            "is_current": is_current,
+        }
+
 
 class TokenStore:
     """
@@ -52,14 +315,29 @@ class TokenStore:
             session_dir: Directory to store session data (defaults to tmp)
         """
         self.device = device
-        self.tokenizer = AudioTokenizer(device=device)
 
-        # Set up inpainting engine for applying edits
-        self.inpainting = IntegratedVoiceInpainting(device=device)
+        # Tokenizer and inpainting engine are created on first use, so stores
+        # that only serve version metadata never load their models
+        self._tokenizer = None
+        self._inpainting = None
+
+        # Per-session lock guarding state mutations
+        self._lock = threading.RLock()
+
+        # Last time the session was looked up or modified, used to expire it
+        self.last_accessed = time.time()
 
         # Version history
         self.versions = []
         self.current_version_index = -1
+        self._max_live_versions = MAX_LIVE_VERSIONS
+
+        # Full tensors of the most recently saved or restored version as
+        # (version_id, audio, rvq_tokens), so diffs need not rebuild them
+        self._last_materialized = None
+
+        # Index of each version in the history by its ID
+        self._version_id_to_index = {}
 
         # Original (ground truth) state
         self.original_state = None
@@ -67,6 +345,32 @@ class TokenStore:
         # Current working state
         self.current_state = None
 
+        # Sorted keys of the current state's token_to_text_map, for bisecting
+        self._sorted_token_keys = []
+
+        # Word timestamps of the current state grouped by their token index
+        self._token_to_words = {}
+
+        # Edits applied since the CUDA cache was last emptied
+        self._edits_since_cache_clear = 0
+
+        # Text of token ranges in the current state, keyed by (start, end)
+        self._text_range_cache = {}
+
+        # Version audio is written to disk by a background thread, so saving
+        # a version does not wait for the host copy and WAV encoding
+        self._io_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="token-store-io"
+        )
+        self._pending_saves = []
+
+        # Serialized version metadata, rebuilt when a version is saved or
+        # restored
+        self._versions_cache = None
+
+        # Serialized tokens of the current version as (version_id, tokens)
+        self._tokens_cache = None
+
         # Session management
         self.session_id = str(uuid.uuid4())
 
@@ -85,8 +389,37 @@ class TokenStore:
         self.audio_dir = self.session_dir / "audio"
         self.audio_dir.mkdir(exist_ok=True)
 
+        # Sequence number for audio filenames, unique within the session even
+        # for several saves in the same second
+        self._file_counter = itertools.count()
+
         logger.info(f"TokenStore initialized with session ID: {self.session_id}")
 
+    @property
+    def tokenizer(self):
+        """Audio tokenizer, created on first access
+
+        Returns:
+            AudioTokenizer for this store's device
+        """
+        if self._tokenizer is None:
+            self._tokenizer = AudioTokenizer(
+                device=self.device, keep_whisper_loaded=True
+            )
+        return self._tokenizer
+
+    @property
+    def inpainting(self):
+        """Inpainting engine for applying edits, created on first access
+
+        Returns:
+            IntegratedVoiceInpainting for this store's device
+        """
+        if self._inpainting is None:
+            self._inpainting = IntegratedVoiceInpainting(device=self.device)
+        return self._inpainting
+
+    @_synchronized
     def initialize(self, audio_path, speaker_id=0):
         """Initialize token store with audio file
 
@@ -97,7 +430,7 @@ class TokenStore:
         Returns:
             TokenizedAudio representing the initial state
         """
-        logger.info(f"Initializing TokenStore with audio from: {audio_path}")
+        logger.info("Initializing TokenStore with audio from: {}", audio_path)
 
         # Log memory before tokenization
         MemoryManager.log_memory_stats("Before TokenStore initialization")
@@ -105,9 +438,12 @@ class TokenStore:
         # Tokenize the audio only once for the entire session
         tokenized_audio = self.tokenizer.tokenize(audio_path, speaker_id=speaker_id)
 
-        # Store as original and current state
+        # Store as original and current state. Both share the tokenized
+        # tensors: the original state is never modified after this point, and
+        # edits replace the current state's tensors instead of writing to them.
         self.original_state = tokenized_audio
-        self.current_state = deepcopy(tokenized_audio)
+        self.current_state = _snapshot_state(tokenized_audio, tokenized_audio.audio)
+        self._index_current_state()
 
         # Save a copy of the original audio
         original_audio_path = self._save_audio(audio_path, "original")
@@ -121,11 +457,12 @@ class TokenStore:
         MemoryManager.log_memory_stats("After TokenStore initialization")
 
         logger.info(
-            f"TokenStore initialized with audio length: {tokenized_audio.audio.shape[0] / tokenized_audio.sample_rate:.2f}s"
+            "TokenStore initialized with audio length: {:.2f}s",
+            tokenized_audio.audio.shape[0] / tokenized_audio.sample_rate,
         )
-        logger.info(f"Transcript: {tokenized_audio.text}")
+        logger.info("Transcript: {}", tokenized_audio.text)
         if tokenized_audio.rvq_tokens is not None:
-            logger.info(f"RVQ tokens shape: {tokenized_audio.rvq_tokens.shape}")
+            logger.info("RVQ tokens shape: {}", tokenized_audio.rvq_tokens.shape)
 
         return self.current_state
 
@@ -141,27 +478,20 @@ class TokenStore:
         """
         logger.info("Initializing TokenStore from audio blob")
 
-        # Save blob to temporary file
-        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp_file:
-            tmp_path = tmp_file.name
-
+        # Write the blob straight into the session's audio directory, where it
+        # is kept as the original audio, instead of staging it in a temp file
+        target = self.audio_dir / f"original_{next(self._file_counter):06d}.wav"
+        with open(target, "wb") as f:
             # If blob is bytes, write directly
             if isinstance(audio_blob, bytes):
-                tmp_file.write(audio_blob)
+                f.write(audio_blob)
             # If blob is a file-like object, read and write
             else:
-                tmp_file.write(audio_blob.read())
+                f.write(audio_blob.read())
 
-        try:
-            # Initialize from the temp file
-            result = self.initialize(tmp_path, speaker_id)
-        finally:
-            # Always clean up the temp file
-            if os.path.exists(tmp_path):
-                os.unlink(tmp_path)
-
-        return result
+        return self.initialize(str(target), speaker_id)
 
+    @_synchronized
     def apply_edit(self, start_token_idx, end_token_idx, new_text):
         """Apply a text edit to the current state
 
@@ -177,7 +507,10 @@ class TokenStore:
             raise ValueError("TokenStore not initialized")
 
         logger.info(
-            f"Applying edit: tokens [{start_token_idx}:{end_token_idx}] -> '{new_text}'"
+            "Applying edit: tokens [{}:{}] -> '{}'",
+            start_token_idx,
+            end_token_idx,
+            new_text,
         )
 
         # Get original text
@@ -208,10 +541,11 @@ class TokenStore:
             "Edit", description, modified_indices, generated_regions
         )
 
-        logger.info(f"Edit applied successfully. New version: {version_id}")
+        logger.info("Edit applied successfully. New version: {}", version_id)
 
         return self.current_state
 
+    @_synchronized
     def apply_edit_operations(self, edit_operations):
         """Apply multiple edit operations at once
 
@@ -224,7 +558,7 @@ class TokenStore:
         if self.current_state is None:
             raise ValueError("TokenStore not initialized")
 
-        logger.info(f"Applying {len(edit_operations)} edit operations")
+        logger.info("Applying {} edit operations", len(edit_operations))
 
         # Convert dicts to EditOperation objects if needed
         normalized_ops = []
@@ -252,30 +586,28 @@ class TokenStore:
         normalized_ops.sort(key=lambda op: op.start_token_idx)
 
         # Track token indices that get modified
-        modified_indices = []
-
-        # Track all generated regions
-        all_generated_regions = []
+        modified_indices = set()
 
-        # Apply each edit operation
+        # Collect modified token indices
         for op in normalized_ops:
-            # Collect modified token indices
-            for i in range(op.start_token_idx, op.end_token_idx):
-                if i not in modified_indices:
-                    modified_indices.append(i)
-
-            # Apply the edit to generate new audio and tokens
-            modified_audio, modified_tokens, generated_regions = (
-                self._apply_edit_operation(op)
-            )
+            modified_indices.update(range(op.start_token_idx, op.end_token_idx))
+
+        # Generate new audio and tokens for all edits at once
+        modified_audio, modified_tokens, generated_regions = (
+            self._apply_edit_operations_batch(normalized_ops)
+        )
 
-            # Update the current state with modified data
+        # Update the current state with modified data. The text is edited right
+        # to left, so the character positions of earlier edits stay valid.
+        for op, op_regions in reversed(list(zip(normalized_ops, generated_regions))):
             self._update_state_from_edit(
-                op, modified_audio, modified_tokens, generated_regions
+                op, modified_audio, modified_tokens, op_regions
             )
 
-            # Collect generated regions
-            all_generated_regions.extend(generated_regions)
+        # Collect generated regions
+        all_generated_regions = [
+            region for op_regions in generated_regions for region in op_regions
+        ]
 
         # Create a combined edit description
         edit_description = " | ".join(
@@ -284,10 +616,13 @@ class TokenStore:
 
         # Save a version with the edits
         version_id = self.save_version(
-            "Multi-edit", edit_description, modified_indices, all_generated_regions
+            "Multi-edit",
+            edit_description,
+            sorted(modified_indices),
+            all_generated_regions,
         )
 
-        logger.info(f"Multiple edits applied successfully. New version: {version_id}")
+        logger.info("Multiple edits applied successfully. New version: {}", version_id)
 
         return self.current_state
 
@@ -299,6 +634,7 @@ class TokenStore:
         """
         return self.current_state
 
+    @_synchronized
     def save_version(
         self, label, description="", modified_token_indices=None, generated_regions=None
     ):
@@ -329,6 +665,7 @@ class TokenStore:
             generated_regions or [],
         )
 
+    @_synchronized
     def restore_version(self, version_id=None, version_index=None):
         """Restore to a previous version by ID or index
 
@@ -344,54 +681,59 @@ class TokenStore:
 
         if version_id is not None:
             # Find version by ID
-            for i, version in enumerate(self.versions):
-                if version.id == version_id:
-                    version_index = i
-                    break
-            else:
+            version_index = self._version_id_to_index.get(version_id)
+            if version_index is None:
                 raise ValueError(f"Version ID {version_id} not found")
 
         if version_index is not None:
             if version_index < 0 or version_index >= len(self.versions):
                 raise ValueError(f"Version index {version_index} out of range")
 
-            logger.info(f"Restoring to version index {version_index}")
+            logger.info("Restoring to version index {}", version_index)
 
             # Set current version index
             self.current_version_index = version_index
+            self._versions_cache = None
+
+            # Restore state from version. Archived tensors are int16 audio and
+            # tokens in host memory, so start copying them back to the working
+            # device and dequantize the audio there.
+            token_data = self._materialize_version(version_index)
+            self.current_state = _snapshot_state(
+                token_data,
+                _dequantize_audio(to_device_async(token_data.audio, self.device)),
+            )
+            if token_data.rvq_tokens is not None:
+                self.current_state.rvq_tokens = to_device_async(
+                    token_data.rvq_tokens, self.device
+                )
+            self._index_current_state()
 
-            # Restore state from version
-            self.current_state = deepcopy(self.versions[version_index].token_data)
-
-            logger.info(f"Restored to version: {self.versions[version_index].label}")
+            logger.info("Restored to version: {}", self.versions[version_index].label)
         else:
             raise ValueError("Must provide either version_id or version_index")
 
         return self.current_state
 
+    @_synchronized
     def get_versions(self):
         """Get all versions
 
+        The list is memoized until a version is saved or restored. Callers must
+        treat it as read-only.
+
         Returns:
             List of version metadata (without full token data)
         """
-        # Return lightweight version info without full token data
-        result = []
-        for i, v in enumerate(self.versions):
-            result.append(
-                {
-                    "id": v.id,
-                    "label": v.label,
-                    "timestamp": v.timestamp,
-                    "edit_description": v.edit_description,
-                    "modified_token_indices": v.modified_token_indices,
-                    "generated_regions": v.generated_regions,
-                    "index": i,
-                    "is_current": (i == self.current_version_index),
-                }
-            )
-        return result
-
+        if self._versions_cache is None:
+            # Lightweight version info without full token data
+            self._versions_cache = [
+                version.to_dict(i, i == self.current_version_index)
+                for i, version in enumerate(self.versions)
+            ]
+        return self._versions_cache
+
+    @_synchronized
     def get_version(self, version_id=None, version_index=None):
         """Get a specific version
 
@@ -400,22 +742,22 @@ class TokenStore:
             version_index: Version index to get (alternative to version_id)
 
         Returns:
-            TokenStoreVersion object
+            TokenStoreVersion object. Its token_data holds no audio or RVQ
+            tokens if the version is stored as a diff.
         """
         if version_id is not None:
             # Find version by ID
-            for i, version in enumerate(self.versions):
-                if version.id == version_id:
-                    version_index = i
-                    break
-            else:
+            version_index = self._version_id_to_index.get(version_id)
+            if version_index is None:
                 raise ValueError(f"Version ID {version_id} not found")
 
         if version_index is not None:
             if version_index < 0 or version_index >= len(self.versions):
                 raise ValueError(f"Version index {version_index} out of range")
 
-            return self.versions[version_index]
+            version = self.versions[version_index]
+            self._load_version_data(version)
+            return version
         else:
             raise ValueError("Must provide either version_id or version_index")
 
@@ -458,34 +800,172 @@ class TokenStore:
         # Generate a unique ID
         version_id = str(uuid.uuid4())
 
+        # If we've gone back in history and then made a change, remove future versions
+        if self.current_version_index < len(self.versions) - 1:
+            logger.info(
+                f"Removing {len(self.versions) - self.current_version_index - 1} future versions"
+            )
+            for removed in self.versions[self.current_version_index + 1 :]:
+                del self._version_id_to_index[removed.id]
+                if removed.spill_path and os.path.exists(removed.spill_path):
+                    os.unlink(removed.spill_path)
+            self.versions = self.versions[: self.current_version_index + 1]
+
+        # The working state keeps float32 audio for editing, while archived
+        # versions store it as int16 PCM in host memory, so VRAM does not grow
+        # with the number of versions
+        audio = _to_host(_quantize_audio(self.current_state.audio))
+        rvq_tokens = _to_host(self.current_state.rvq_tokens)
+
+        # Snapshot the current state. Checkpoint versions keep the full
+        # tensors, the others only what changed since the previous version.
+        if len(self.versions) % _CHECKPOINT_INTERVAL == 0:
+            token_data = _snapshot_state(self.current_state, audio)
+            token_data.rvq_tokens = rvq_tokens
+            diff = None
+        else:
+            base = self._materialize_version(len(self.versions) - 1)
+            token_data = _snapshot_state(self.current_state, None)
+            token_data.rvq_tokens = None
+            diff = TokenStoreVersionDiff(
+                base_version_id=self.versions[-1].id,
+                audio_patch=TensorPatch.between(base.audio, audio),
+                token_patch=TensorPatch.between(base.rvq_tokens, rvq_tokens),
+            )
+
         # Create a new version object
         version = TokenStoreVersion(
             id=version_id,
             label=label,
             timestamp=time.time(),
-            token_data=deepcopy(self.current_state),
+            token_data=token_data,
+            diff=diff,
             audio_path=audio_path,
             edit_description=description,
             modified_token_indices=modified_token_indices,
             generated_regions=generated_regions or [],
         )
 
-        # If we've gone back in history and then made a change, remove future versions
-        if self.current_version_index < len(self.versions) - 1:
-            logger.info(
-                f"Removing {len(self.versions) - self.current_version_index - 1} future versions"
-            )
-            self.versions = self.versions[: self.current_version_index + 1]
-
         # Add to versions list
         self.versions.append(version)
         self.current_version_index = len(self.versions) - 1
+        self._version_id_to_index[version_id] = self.current_version_index
+        self._versions_cache = None
+
+        # The next version is most likely diffed against this one
+        self._last_materialized = (version_id, audio, rvq_tokens)
+
+        # Keep the memory used by the history bounded
+        self._spill_old_versions()
 
         return version_id
 
+    def _spill_old_versions(self):
+        """Move the token data of the oldest versions to disk
+
+        Keeps at most _max_live_versions versions in memory. The current
+        version always stays in memory.
+        """
+        live = [
+            i
+            for i, version in enumerate(self.versions)
+            if version.token_data is not None and i != self.current_version_index
+        ]
+        # The current version counts towards the limit
+        excess = len(live) + 1 - self._max_live_versions
+        if excess <= 0:
+            return
+
+        spill_dir = self.session_dir / "versions"
+        spill_dir.mkdir(exist_ok=True)
+
+        for i in live[:excess]:
+            version = self.versions[i]
+            # Versions never change, so one loaded back keeps its spill file
+            if version.spill_path is None:
+                version.spill_path = str(spill_dir / f"{version.id}.pt")
+                torch.save((version.token_data, version.diff), version.spill_path)
+            version.token_data = None
+            version.diff = None
+            logger.debug("Spilled version {} to {}", version.id, version.spill_path)
+
+    def _load_version_data(self, version):
+        """Get a version's token data, loading it back if it was spilled
+
+        Args:
+            version: TokenStoreVersion to load
+
+        Returns:
+            TokenizedAudio of the version (without tensors for a diff version)
+        """
+        if version.token_data is None:
+            logger.debug("Loading spilled version {}", version.id)
+            # TokenizedAudio is a plain dataclass, not just tensors
+            version.token_data, version.diff = torch.load(
+                version.spill_path, map_location="cpu", weights_only=False
+            )
+        return version.token_data
+
+    def _materialize_version(self, version_index):
+        """Get a version's token data with its full tensors
+
+        Applies the patches of the versions since the nearest checkpoint.
+
+        Args:
+            version_index: Index of the version
+
+        Returns:
+            TokenizedAudio of the version with its archived (host) tensors
+        """
+        token_data = self._load_version_data(self.versions[version_index])
+        version_id = self.versions[version_index].id
+        if self._last_materialized and self._last_materialized[0] == version_id:
+            _, audio, rvq_tokens = self._last_materialized
+            return replace(token_data, audio=audio, rvq_tokens=rvq_tokens)
+
+        # Walk back to the nearest version stored in full
+        chain = []
+        i = version_index
+        while self.versions[i].diff is not None:
+            chain.append(self.versions[i].diff)
+            i -= 1
+            self._load_version_data(self.versions[i])
+
+        base = self.versions[i].token_data
+        audio, rvq_tokens = base.audio, base.rvq_tokens
+        for diff in reversed(chain):
+            if diff.audio_patch is not None:
+                audio = diff.audio_patch.apply(audio)
+            else:
+                audio = None
+            if diff.token_patch is not None:
+                rvq_tokens = diff.token_patch.apply(rvq_tokens)
+            else:
+                rvq_tokens = None
+
+        self._last_materialized = (version_id, audio, rvq_tokens)
+        return replace(token_data, audio=audio, rvq_tokens=rvq_tokens)
+
+    def _index_current_state(self):
+        """Rebuild lookup structures derived from the current state
+
+        Edits never change the token map or the word timestamps, so this only
+        runs when the current state is replaced (initialize, restore_version).
+        """
+        self._text_range_cache.clear()
+        self._sorted_token_keys = sorted(self.current_state.token_to_text_map or ())
+
+        self._token_to_words = {}
+        for word_info in self.current_state.word_timestamps or ():
+            token_idx = word_info.get("token_idx")
+            if token_idx is not None:
+                self._token_to_words.setdefault(token_idx, []).append(word_info)
+
     def _get_text_for_token_range(self, start_token_idx, end_token_idx):
         """Get text for a token range
 
+        Results are memoized until the current state's text changes.
+
         Args:
             start_token_idx: Starting token index (inclusive)
             end_token_idx: Ending token index (exclusive)
@@ -496,27 +976,31 @@ class TokenStore:
         if self.current_state is None:
             raise ValueError("TokenStore not initialized")
 
+        cache_key = (start_token_idx, end_token_idx)
+        cached = self._text_range_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
         # Initialize empty result
         result_text = ""
 
         # Use token_to_text_map to find the text positions
         if self.current_state.token_to_text_map:
             # Find the text ranges for each token in the range
+            token_map = self.current_state.token_to_text_map
+            keys = self._sorted_token_keys
             start_positions = []
             end_positions = []
 
-            for token_idx in range(start_token_idx, end_token_idx):
-                if token_idx in self.current_state.token_to_text_map:
-                    char_idx = self.current_state.token_to_text_map[token_idx]
-                    start_positions.append(char_idx)
+            # Mapped tokens in the range are a contiguous slice of the sorted keys
+            lo = bisect.bisect_left(keys, start_token_idx)
+            hi = bisect.bisect_left(keys, end_token_idx)
+            for i in range(lo, hi):
+                start_positions.append(token_map[keys[i]])
 
-                    # Try to find end position from next token
-                    for next_idx in range(token_idx + 1, end_token_idx + 2):
-                        if next_idx in self.current_state.token_to_text_map:
-                            end_positions.append(
-                                self.current_state.token_to_text_map[next_idx]
-                            )
-                            break
+                # End position comes from the next mapped token, if any
+                if i + 1 < len(keys) and keys[i + 1] <= end_token_idx + 1:
+                    end_positions.append(token_map[keys[i + 1]])
 
             if start_positions:
                 # Get the range of text from min start to max end position
@@ -534,18 +1018,11 @@ class TokenStore:
         # If we couldn't determine the text from the token map, try using word timestamps
         if not result_text and self.current_state.word_timestamps:
             # Find words that correspond to the token range
-            words = []
-
-            # Filter word timestamps to those in our token range
-            for word_info in self.current_state.word_timestamps:
-                # This depends on how word_timestamps is structured
-                token_idx = word_info.get("token_idx")
-
-                if (
-                    token_idx is not None
-                    and start_token_idx <= token_idx < end_token_idx
-                ):
-                    words.append(word_info.get("text", ""))
+            words = [
+                word_info.get("text", "")
+                for token_idx in range(start_token_idx, end_token_idx)
+                for word_info in self._token_to_words.get(token_idx, ())
+            ]
 
             # Join words with spaces
             result_text = " ".join(words)
@@ -557,6 +1034,10 @@ class TokenStore:
                 f"Could not determine text for token range {start_token_idx}-{end_token_idx}"
             )
 
+        if len(self._text_range_cache) >= _TEXT_RANGE_CACHE_SIZE:
+            self._text_range_cache.clear()
+        self._text_range_cache[cache_key] = result_text
+
         return result_text
 
     def _apply_edit_operation(self, edit_op):
@@ -577,7 +1058,11 @@ class TokenStore:
         end_idx = edit_op.end_token_idx
 
         logger.info(
-            f"Applying edit operation: [{start_idx}:{end_idx}] '{edit_op.original_text}' -> '{edit_op.edited_text}'"
+            "Applying edit operation: [{}:{}] '{}' -> '{}'",
+            start_idx,
+            end_idx,
+            edit_op.original_text,
+            edit_op.edited_text,
         )
 
         try:
@@ -592,49 +1077,104 @@ class TokenStore:
             # Log memory after inpainting
             MemoryManager.log_memory_stats("After inpainting in TokenStore")
 
-            # Create a record of the generated region based on token timing
-            generated_regions = []
-
-            # Get timing information for the tokens
-            if self.current_state.word_timestamps:
-                # Find the word timestamps that correspond to our token range
-                for word_info in self.current_state.word_timestamps:
-                    token_idx = word_info.get("token_idx")
-                    if token_idx is not None and start_idx <= token_idx < end_idx:
-                        generated_regions.append(
-                            {
-                                "start": word_info.get("start_time", 0),
-                                "end": word_info.get("end_time", 0),
-                                "original": edit_op.original_text,
-                                "edited": edit_op.edited_text,
-                            }
-                        )
-                        break  # Just need one region for now
-
-            # If no timestamps found, create a generic region
-            if not generated_regions:
-                # Create a placeholder region - in real system this would have actual timing
+            generated_regions = self._generated_regions_for_edit(edit_op)
+
+            return inpainted_audio, inpainted_tokens, generated_regions
+
+        except Exception as e:
+            logger.error(f"Error applying edit operation: {e}")
+            # Return unmodified audio and tokens on error
+            return self.current_state.audio, self.current_state.rvq_tokens, []
+
+    def _apply_edit_operations_batch(self, edit_ops):
+        """Apply several edit operations to the audio in one inpainting pass
+
+        The CSM model is loaded once for all edits and the audio is
+        reconstructed once from the final tokens, instead of once per edit.
+
+        Args:
+            edit_ops: EditOperations sorted by start token index
+
+        Returns:
+            Tuple of (modified_audio, modified_tokens, generated_regions per edit)
+        """
+        if self.current_state is None:
+            raise ValueError("TokenStore not initialized")
+
+        try:
+            # Log memory before inpainting
+            MemoryManager.log_memory_stats("Before batch inpainting in TokenStore")
+
+            inpainted_tokens, inpainted_audio, sr = self.inpainting.batch_inpaint(
+                self.current_state, edit_ops, temperature=0.7, topk=25
+            )
+
+            # Log memory after inpainting
+            MemoryManager.log_memory_stats("After batch inpainting in TokenStore")
+
+            generated_regions = [
+                self._generated_regions_for_edit(op) for op in edit_ops
+            ]
+            return inpainted_audio, inpainted_tokens, generated_regions
+
+        except Exception as e:
+            logger.error(f"Error applying edit operations: {e}")
+            # Return unmodified audio and tokens on error
+            return (
+                self.current_state.audio,
+                self.current_state.rvq_tokens,
+                [[] for _ in edit_ops],
+            )
+
+    def _generated_regions_for_edit(self, edit_op):
+        """Create a record of the region an edit generated based on token timing
+
+        Args:
+            edit_op: The edit operation that was applied
+
+        Returns:
+            List of generated region dicts
+        """
+        generated_regions = []
+
+        # Get timing information from the first word timestamp in our
+        # token range
+        for token_idx in range(edit_op.start_token_idx, edit_op.end_token_idx):
+            words = self._token_to_words.get(token_idx)
+            if words:
+                word_info = words[0]
                 generated_regions.append(
                     {
-                        "start": 0.5,  # Placeholder
-                        "end": 1.5,  # Placeholder
+                        "start": word_info.get("start_time", 0),
+                        "end": word_info.get("end_time", 0),
                         "original": edit_op.original_text,
                         "edited": edit_op.edited_text,
                     }
                 )
+                break  # Just need one region for now
 
-            return inpainted_audio, inpainted_tokens, generated_regions
+        # If no timestamps found, create a generic region
+        if not generated_regions:
+            # Create a placeholder region - in real system this would have actual timing
+            generated_regions.append(
+                {
+                    "start": 0.5,  # Placeholder
+                    "end": 1.5,  # Placeholder
+                    "original": edit_op.original_text,
+                    "edited": edit_op.edited_text,
+                }
+            )
 
-        except Exception as e:
-            logger.error(f"Error applying edit operation: {e}")
-            # Return unmodified audio and tokens on error
-            return self.current_state.audio, self.current_state.rvq_tokens, []
+        return generated_regions
 
     def _update_state_from_edit(
         self, edit_op, modified_audio, modified_tokens, generated_regions
     ):
         """Update the current state after an edit
 
+        Tensors and containers of the current state are replaced, never
+        modified in place, since version snapshots share them by reference.
+
         Args:
             edit_op: The edit operation that was applied
             modified_audio: The modified audio tensor
@@ -644,12 +1184,20 @@ class TokenStore:
         if self.current_state is None:
             raise ValueError("TokenStore not initialized")
 
-        # Update audio
-        self.current_state.audio = modified_audio
+        # The text changes, so cached token range texts are stale
+        self._text_range_cache.clear()
 
-        # Update RVQ tokens
+        # Update audio and RVQ tokens. Reassigning drops the working state's
+        # references to the old tensors; archived versions hold host copies.
+        self.current_state.audio = modified_audio
         self.current_state.rvq_tokens = modified_tokens
 
+        # Return cached GPU blocks to the driver every few edits
+        self._edits_since_cache_clear += 1
+        if self._edits_since_cache_clear >= _EDITS_PER_CACHE_CLEAR:
+            MemoryManager.clear_gpu_memory()
+            self._edits_since_cache_clear = 0
+
         # Update text with the edited text
         if (
             self.current_state.token_to_text_map
@@ -664,11 +1212,10 @@ class TokenStore:
                 end_char = self.current_state.token_to_text_map[edit_op.end_token_idx]
             else:
                 # Look for the nearest token after end_token_idx
-                token_indices = sorted(self.current_state.token_to_text_map.keys())
-                for token_idx in token_indices:
-                    if token_idx > edit_op.end_token_idx:
-                        end_char = self.current_state.token_to_text_map[token_idx]
-                        break
+                keys = self._sorted_token_keys
+                i = bisect.bisect_right(keys, edit_op.end_token_idx)
+                if i < len(keys):
+                    end_char = self.current_state.token_to_text_map[keys[i]]
 
             # If end char not found, use end of text
             if end_char is None:
@@ -691,14 +1238,24 @@ class TokenStore:
         Returns:
             Path to the saved audio file
         """
+        # Files already in the session (e.g. written by initialize_from_blob)
+        # are kept where they are
+        if Path(audio_path).resolve().parent == self.audio_dir.resolve():
+            return str(audio_path)
+
         # Generate a unique filename
-        filename = f"{label}_{int(time.time())}.wav"
+        filename = f"{label}_{next(self._file_counter):06d}.wav"
         save_path = self.audio_dir / filename
 
-        # Copy the audio file
-        import shutil
+        # Hardlink the audio file, since the pipeline never modifies it. The
+        # link survives the source being deleted. Fall back to copying across
+        # filesystems or where links are not supported.
+        try:
+            os.link(audio_path, save_path)
+        except OSError:
+            import shutil
 
-        shutil.copy2(audio_path, save_path)
+            shutil.copy2(audio_path, save_path)
 
         return str(save_path)
 
@@ -714,33 +1271,101 @@ class TokenStore:
             Path to the saved audio file
         """
         # Generate a unique filename
-        filename = f"{label}_{int(time.time())}.wav"
+        filename = f"{label}_{next(self._file_counter):06d}.wav"
         save_path = self.audio_dir / filename
 
-        # Ensure tensor has the right shape for torchaudio.save
-        if audio_tensor.dim() == 1:
-            audio_tensor = audio_tensor.unsqueeze(0)
-
-        # Save the audio
-        torchaudio.save(str(save_path), audio_tensor.cpu(), sample_rate)
+        # Write in the background. The tensor is never modified in place
+        # (edits assign new tensors), so the writer can read it later.
+        self._pending_saves = [f for f in self._pending_saves if not f.done()]
+        self._pending_saves.append(
+            self._io_executor.submit(
+                _write_audio, audio_tensor.detach(), sample_rate, str(save_path)
+            )
+        )
 
         return str(save_path)
 
+    @_synchronized
+    def wait_for_pending_saves(self):
+        """Block until all version audio files have been written to disk
+
+        Call this before reading a version's audio_path.
+
+        Raises:
+            Exception: Whatever error a background write raised
+        """
+        pending, self._pending_saves = self._pending_saves, []
+        for future in pending:
+            future.result()
+
+    @_synchronized
     def cleanup(self):
         """Clean up resources used by the token store"""
-        # Clear GPU memory
-        MemoryManager.clear_gpu_memory()
+        # Finish writing version audio and stop the writer thread before the
+        # session is torn down
+        self.wait_for_pending_saves()
+        self._io_executor.shutdown(wait=True)
+
+        # Release the session's tensors, so they are freed even if a caller
+        # still holds a reference to the store
+        self.current_state = None
+        self.original_state = None
+        self.versions = []
+        self.current_version_index = -1
+        self._version_id_to_index = {}
+        self._last_materialized = None
+        self._versions_cache = None
+        self._tokens_cache = None
+        self._text_range_cache.clear()
+        self._token_to_words = {}
+        self._sorted_token_keys = []
 
         # Clean up the tokenizer
-        if hasattr(self.tokenizer, "cleanup"):
-            self.tokenizer.cleanup()
+        if self._tokenizer is not None and hasattr(self._tokenizer, "cleanup"):
+            self._tokenizer.cleanup()
 
         # Clean up the inpainting engine
-        if hasattr(self.inpainting, "_unload_csm_model"):
-            self.inpainting._unload_csm_model()
+        if self._inpainting is not None:
+            self._inpainting._unload_csm_model()
+
+        # Clear GPU memory
+        MemoryManager.clear_gpu_memory()
 
         logger.info("TokenStore cleaned up")
 
+    @_synchronized
+    def format_tokens(self):
+        """Get the current state's word tokens in a serializable format
+
+        The list is memoized per version, so repeated calls (e.g. UI polling)
+        return the same list until an edit or restore changes the version.
+        Callers must treat it as read-only.
+
+        Returns:
+            List of token info dicts
+        """
+        if self.current_state is None:
+            return []
+
+        version_id = self.versions[self.current_version_index].id
+        if self._tokens_cache is not None and self._tokens_cache[0] == version_id:
+            return self._tokens_cache[1]
+
+        tokens = [
+            {
+                "token_idx": word_info.get("token_idx", -1),
+                "text": word_info.get("text", ""),
+                "start_time": word_info.get("start", 0),
+                "end_time": word_info.get("end", 0),
+                "confidence": word_info.get("confidence", 1.0),
+            }
+            for word_info in self.current_state.word_timestamps or []
+        ]
+
+        self._tokens_cache = (version_id, tokens)
+        return tokens
+
+    @_synchronized
     def to_dict(self):
         """Convert current state to a dictionary for API responses
 
@@ -753,44 +1378,75 @@ class TokenStore:
         # Extract serializable data from the current state
         result = {
             "text": self.current_state.text,
-            "tokens": [],
+            "tokens": self.format_tokens(),
             "session_id": self.session_id,
             "current_version_index": self.current_version_index,
             "total_versions": len(self.versions),
             "versions": self.get_versions(),
         }
 
-        # Convert tokens to a serializable format
-        if self.current_state.word_timestamps:
-            for word_info in self.current_state.word_timestamps:
-                token_info = {
-                    "token_idx": word_info.get("token_idx", -1),
-                    "text": word_info.get("text", ""),
-                    "start_time": word_info.get("start", 0),
-                    "end_time": word_info.get("end", 0),
-                    "confidence": word_info.get("confidence", 1.0),
-                }
-                result["tokens"].append(token_info)
-
         return result
 
 
-# Global registry of token stores
-_TOKEN_STORES = {}
+# Global registry of token stores. The lock is only held for dictionary
+# access, never while a store is working, so sessions don't block each other.
+# The registry deliberately holds strong references: between requests it is
+# the only owner of a session. Stores are released by cleanup_token_store or
+# by the reaper once they expire.
+_TOKEN_STORES: Dict[str, "TokenStore"] = {}
+_REGISTRY_LOCK = threading.Lock()
+
+# Registered token stores not accessed for this many seconds are cleaned up
+TOKEN_STORE_MAX_AGE = 3600.0
+
+# Background thread that periodically cleans up expired token stores
+_REAPER_THREAD = None
+_REAPER_STOP = threading.Event()
 
 
 def register_token_store(token_store):
     """Register a token store in the global registry
 
+    Also starts the background reaper for expired token stores if needed.
+
     Args:
         token_store: TokenStore instance
     """
-    global _TOKEN_STORES
     session_id = token_store.get_session_id()
-    _TOKEN_STORES[session_id] = token_store
+    with _REGISTRY_LOCK:
+        _TOKEN_STORES[session_id] = token_store
+
+    start_token_store_reaper()
     return session_id
 
 
+def create_token_store(audio, device="cuda", session_dir=None, speaker_id=0):
+    """Create, initialize and register a token store for a new session
+
+    The expensive initialization (transcription and tokenization) runs before
+    the store is registered, so the registry lock is only held for the insert
+    and other sessions are never blocked by an upload.
+
+    Args:
+        audio: Path to an audio file, or an audio blob (bytes or file-like object)
+        device: Device to use for tokenization and processing
+        session_dir: Directory to store session data (defaults to tmp)
+        speaker_id: Speaker identifier (default 0)
+
+    Returns:
+        Initialized and registered TokenStore instance
+    """
+    token_store = TokenStore(device=device, session_dir=session_dir)
+
+    if isinstance(audio, (str, os.PathLike)):
+        token_store.initialize(audio, speaker_id=speaker_id)
+    else:
+        token_store.initialize_from_blob(audio, speaker_id=speaker_id)
+
+    register_token_store(token_store)
+    return token_store
+
+
 def get_token_store_by_id(session_id):
     """Get a token store by session ID
 
@@ -800,7 +1456,12 @@ def get_token_store_by_id(session_id):
     Returns:
         TokenStore instance or None if not found
     """
-    return _TOKEN_STORES.get(session_id)
+    with _REGISTRY_LOCK:
+        token_store = _TOKEN_STORES.get(session_id)
+
+    if token_store is not None:
+        token_store.last_accessed = time.time()
+    return token_store
 
 
 def cleanup_token_store(session_id):
@@ -809,8 +1470,78 @@ def cleanup_token_store(session_id):
     Args:
         session_id: Session ID
     """
-    global _TOKEN_STORES
-    if session_id in _TOKEN_STORES:
-        token_store = _TOKEN_STORES[session_id]
+    with _REGISTRY_LOCK:
+        token_store = _TOKEN_STORES.pop(session_id, None)
+
+    # Clean up outside the registry lock; this waits for the store's own lock
+    if token_store is not None:
+        token_store.cleanup()
+
+
+def cleanup_expired_token_stores(max_age=TOKEN_STORE_MAX_AGE):
+    """Clean up and remove token stores that have not been accessed recently
+
+    Args:
+        max_age: Maximum time in seconds since a store was last accessed
+
+    Returns:
+        List of session IDs that were cleaned up
+    """
+    now = time.time()
+    with _REGISTRY_LOCK:
+        expired = [
+            session_id
+            for session_id, token_store in _TOKEN_STORES.items()
+            if now - token_store.last_accessed > max_age
+        ]
+        expired_stores = [_TOKEN_STORES.pop(session_id) for session_id in expired]
+
+    for token_store in expired_stores:
         token_store.cleanup()
-        del _TOKEN_STORES[session_id]
+
+    if expired:
+        logger.info(f"Cleaned up {len(expired)} expired token stores")
+
+    return expired
+
+
+def _reap_expired_token_stores(max_age):
+    """Reaper thread loop: clean up expired token stores until stopped
+
+    Args:
+        max_age: Maximum time in seconds since a store was last accessed
+    """
+    interval = min(300.0, max_age / 10)
+    while not _REAPER_STOP.wait(interval):
+        try:
+            cleanup_expired_token_stores(max_age)
+        except Exception as e:
+            logger.error(f"Error cleaning up expired token stores: {e}")
+
+
+def start_token_store_reaper(max_age=TOKEN_STORE_MAX_AGE):
+    """Start the background thread that cleans up expired token stores
+
+    Does nothing if the reaper is already running.
+
+    Args:
+        max_age: Maximum time in seconds since a store was last accessed
+    """
+    global _REAPER_THREAD
+    with _REGISTRY_LOCK:
+        if _REAPER_THREAD is not None and _REAPER_THREAD.is_alive():
+            return
+
+        _REAPER_STOP.clear()
+        _REAPER_THREAD = threading.Thread(
+            target=_reap_expired_token_stores,
+            args=(max_age,),
+            name="token-store-reaper",
+            daemon=True,
+        )
+        _REAPER_THREAD.start()
+
+
+def stop_token_store_reaper():
+    """Stop the background reaper thread"""
+    _REAPER_STOP.set()
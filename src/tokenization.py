@@ -3,11 +3,16 @@ RVQ tokenization module for voice inpainting with improved memory management.
 Converts audio to semantic and acoustic tokens using Mimi and Llama.
 """
 
+import contextlib
 import os
+import threading
+import numpy as np
 import torch
-import torchaudio
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import List, Dict, Tuple, Optional
+from functools import lru_cache
+from typing import List, Dict, Literal, Tuple, Optional
 from loguru import logger
 from transformers import (
     AutoTokenizer,
@@ -18,16 +23,118 @@ from transformers import (
 from tokenizers.processors import TemplateProcessing
 
 # Import our platform-specific adapter
-from src.mimi_tokenizer import MimiTokenizer
+from src.mimi_tokenizer import (
+    MIMI_FRAME_RATE_DEN,
+    MIMI_FRAME_RATE_NUM,
+    MIMI_SAMPLE_RATE,
+    get_mimi_tokenizer,
+)
+from src.audio_utils import load_audio_resampled, resample
 from src.memory_manager import MemoryManager
 
+# GPU memory that must stay free after transcribing with a shared CrisperWhisper
+# model; below it the model is released to make room for Mimi and CSM
+_WHISPER_MIN_FREE_BYTES = 4 * 1024**3
+
+_shared_whisper_lock = threading.Lock()
+
+# Worker that transcribes while the calling thread encodes with Mimi
+_transcription_executor = ThreadPoolExecutor(
+    max_workers=1, thread_name_prefix="whisper"
+)
+
+# CTranslate2 conversion of CrisperWhisper for the faster-whisper backend,
+# and the sample rate it expects for in-memory audio
+_FASTER_WHISPER_MODEL_ID = "nyrahealth/faster_CrisperWhisper"
+_FASTER_WHISPER_SAMPLE_RATE = 16000
+
+# Allow TF32 tensor cores for float32 matmuls (Ampere and newer), e.g. for
+# layers Mimi's autocast keeps in float32
+torch.set_float32_matmul_precision("high")
+
+
+def _times_to_token_indices(word_timestamps, key):
+    """Convert one timestamp field of every word to Mimi token indices
+
+    Timestamps are rounded to the nearest frame, halves to even like round.
+
+    Args:
+        word_timestamps: List of word timing info from transcription
+        key: Timestamp field to convert ("start" or "end")
+
+    Returns:
+        int64 array with one token index per word
+    """
+    times = np.fromiter(
+        (word_info[key] for word_info in word_timestamps),
+        dtype=np.float64,
+        count=len(word_timestamps),
+    )
+    frames = times * MIMI_FRAME_RATE_NUM / MIMI_FRAME_RATE_DEN
+    return np.rint(frames).astype(np.int64)
+
+
+class PositionMap(Mapping):
+    """Read-only int -> int mapping over dense non-negative keys
+
+    Backed by an int32 array indexed by key, with -1 where a key is unmapped.
+    Text/token maps have an entry for nearly every character, so this takes a
+    fraction of the memory of a dict and lookups are a bounds check and an
+    array read. Keys iterate in ascending order.
+    """
+
+    def __init__(self, array: np.ndarray):
+        """Wrap an array of mapped values
+
+        Args:
+            array: int32 array of values by key, -1 for unmapped keys
+        """
+        self.array = array
+        self.array.flags.writeable = False
+        self._keys = None
+
+    def __getitem__(self, key):
+        if isinstance(key, (int, np.integer)) and 0 <= key < len(self.array):
+            value = self.array[key]
+            if value >= 0:
+                return int(value)
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        return (
+            isinstance(key, (int, np.integer))
+            and 0 <= key < len(self.array)
+            and self.array[key] >= 0
+        )
+
+    @property
+    def keys_array(self) -> np.ndarray:
+        """Mapped keys in ascending order, as an int64 array"""
+        if self._keys is None:
+            self._keys = np.flatnonzero(self.array >= 0)
+        return self._keys
+
+    def __iter__(self):
+        return iter(self.keys_array.tolist())
+
+    def __len__(self):
+        return len(self.keys_array)
+
+    def __repr__(self):
+        return f"PositionMap({dict(self.items())!r})"
+
+    def copy(self):
+        """Return the map itself, since it is immutable"""
+        return self
+
 
 @dataclass
 class TokenizedAudio:
     """Representation of audio as RVQ token sequences"""
 
-    # Original audio and metadata
-    audio: torch.Tensor
+    # Original audio and metadata. Audio is None when tokenized with
+    # keep_audio=False; it is then read back from audio_path when needed.
+    audio: Optional[torch.Tensor]
     sample_rate: int
 
     # Mimi RVQ tokens (num_codebooks, seq_len) - may be None when semantic_only=True
@@ -39,12 +146,17 @@ class TokenizedAudio:
     # Segment-level whisper results with timestamps
     segments: List[Dict] = None
 
-    # Semantic token indices from first codebook or Llama tokens
-    semantic_tokens: List[int] = None
+    # Semantic token indices from the first codebook, a view of rvq_tokens[0]
+    semantic_tokens: Optional[torch.Tensor] = None
 
-    # Mapping between text position and token indices
-    text_to_token_map: Dict[int, int] = None
-    token_to_text_map: Dict[int, int] = None
+    # Mapping between text position and token indices (PositionMap when
+    # created by tokenize)
+    text_to_token_map: Mapping[int, int] = None
+    token_to_text_map: Mapping[int, int] = None
+
+    # Sorted keys of text_to_token_map as an array, for nearest-position
+    # lookups
+    sorted_text_positions: Optional[np.ndarray] = None
 
     # Speaker identifier
     speaker_id: int = 0
@@ -58,17 +170,290 @@ class TokenizedAudio:
     # Mapping from semantic (word) indices to RVQ token indices
     semantic_to_rvq_map: Optional[Dict[int, int]] = None
 
+    # Source file and its peak level, to read back normalized audio that was
+    # not kept
+    audio_path: Optional[str] = None
+    audio_peak: Optional[float] = None
+
+    @property
+    def semantic_tokens_list(self) -> Optional[List[int]]:
+        """Semantic tokens as a list of ints, converted on each access
+
+        Returns:
+            List of semantic token indices, or None without RVQ tokens
+        """
+        if self.semantic_tokens is None:
+            return None
+        return self.semantic_tokens.tolist()
+
+
+def _int8_quantization_config():
+    """Quantization config for loading Whisper with int8 weights
+
+    Returns:
+        BitsAndBytesConfig, or None if bitsandbytes is not installed
+    """
+    try:
+        import bitsandbytes  # noqa: F401
+        from transformers import BitsAndBytesConfig
+    except ImportError:
+        logger.warning("bitsandbytes is not installed, loading Whisper in fp16")
+        return None
+    return BitsAndBytesConfig(load_in_8bit=True)
+
+
+def _load_crisper_whisper_models(device, precision="fp16"):
+    """Load the CrisperWhisper ASR model with Hugging Face Transformers
+
+    Args:
+        device: Device to run inference on
+        precision: "fp16" for float16 weights (float32 off CUDA), or "int8"
+            for int8 linear layers via bitsandbytes on CUDA
+
+    Returns:
+        Tuple of (model, processor, ASR pipeline)
+    """
+    # Log memory before loading
+    MemoryManager.log_memory_stats("Before loading CrisperWhisper")
+
+    logger.info(f"Loading CrisperWhisper ASR model ({precision})...")
+    model_id = "nyrahealth/CrisperWhisper"
+
+    # Determine device type and torch dtype based on available hardware
+    torch_dtype = torch.float16 if torch.cuda.is_available() else torch.float32
+
+    # int8 weights halve the decoder's weight traffic; bitsandbytes needs CUDA
+    quantization_config = None
+    if precision == "int8" and str(device).startswith("cuda"):
+        quantization_config = _int8_quantization_config()
+
+    # Load model. Quantized models are placed on the device while loading
+    # and cannot be moved afterwards.
+    if quantization_config is not None:
+        whisper_model = AutoModelForSpeechSeq2Seq.from_pretrained(
+            model_id,
+            torch_dtype=torch_dtype,
+            low_cpu_mem_usage=True,
+            use_safetensors=True,
+            quantization_config=quantization_config,
+            device_map={"": device},
+        )
+        pipeline_device_kwargs = {}
+    else:
+        whisper_model = AutoModelForSpeechSeq2Seq.from_pretrained(
+            model_id,
+            torch_dtype=torch_dtype,
+            low_cpu_mem_usage=True,
+            use_safetensors=True,
+        )
+        whisper_model.to(device)
+        pipeline_device_kwargs = {"device": device}
+
+    # Load processor
+    whisper_processor = AutoProcessor.from_pretrained(model_id)
+
+    # Create pipeline
+    whisper_pipeline = pipeline(
+        "automatic-speech-recognition",
+        model=whisper_model,
+        tokenizer=whisper_processor.tokenizer,
+        feature_extractor=whisper_processor.feature_extractor,
+        chunk_length_s=30,
+        batch_size=16,
+        return_timestamps="word",
+        torch_dtype=torch_dtype,
+        **pipeline_device_kwargs,
+    )
+
+    # Optionally compile the model (opt-in through WHISPER_COMPILE). The
+    # bitsandbytes kernels do not compile into a single graph.
+    compile_whisper = os.environ.get("WHISPER_COMPILE", "") not in ("", "0")
+    if (
+        compile_whisper
+        and str(device).startswith("cuda")
+        and quantization_config is None
+    ):
+        _compile_crisper_whisper(whisper_model, whisper_pipeline)
+
+    # Log memory after loading
+    MemoryManager.log_memory_stats("After loading CrisperWhisper")
+
+    return whisper_model, whisper_processor, whisper_pipeline
+
+
+def _compile_crisper_whisper(whisper_model, whisper_pipeline):
+    """Compile the CrisperWhisper model with a static KV cache
+
+    Autoregressive decoding dominates transcription time. A static cache
+    gives the decoder fixed shapes, so torch.compile can fuse its kernels
+    and replay each step as a CUDA graph. Compilation happens in a warmup
+    transcription here rather than on the first real request; Inductor's
+    on-disk FX graph cache makes later processes compile faster.
+
+    Args:
+        whisper_model: CrisperWhisper model, compiled in place
+        whisper_pipeline: ASR pipeline wrapping the model
+    """
+    os.environ.setdefault("TORCHINDUCTOR_FX_GRAPH_CACHE", "1")
+
+    logger.info("Compiling CrisperWhisper with a static KV cache")
+    generation_config = whisper_model.generation_config
+    generation_config.cache_implementation = "static"
+    generation_config.max_new_tokens = 440
+    whisper_model.forward = torch.compile(
+        whisper_model.forward, mode="reduce-overhead", fullgraph=True
+    )
+
+    # Warm up on a second of silence to trigger compilation
+    whisper_pipeline({"raw": torch.zeros(16000).numpy(), "sampling_rate": 16000})
+
+
+@lru_cache(maxsize=1)
+def _load_shared_crisper_whisper(device, precision):
+    """Load the models behind get_crisper_whisper; the cache holds the most recent"""
+    logger.info("Initializing shared CrisperWhisper model")
+    return _load_crisper_whisper_models(device, precision)
+
+
+def get_crisper_whisper(device, precision="fp16"):
+    """Get the process-wide CrisperWhisper models for a device, loading them once
+
+    The models stay loaded across tokenizers and requests until
+    release_crisper_whisper is called. Requesting another device or precision
+    replaces them.
+
+    Args:
+        device: Device to run inference on
+        precision: Weight precision, "fp16" or "int8"
+
+    Returns:
+        Tuple of (model, processor, ASR pipeline)
+    """
+    with _shared_whisper_lock:
+        return _load_shared_crisper_whisper(device, precision)
+
+
+@lru_cache(maxsize=1)
+def _load_faster_whisper(device, compute_type):
+    """Load CrisperWhisper as a batched faster-whisper (CTranslate2) pipeline
+
+    Args:
+        device: CTranslate2 device ("cuda" or "cpu")
+        compute_type: CTranslate2 compute type, e.g. "int8_float16"
+
+    Returns:
+        BatchedInferencePipeline around the model
+    """
+    try:
+        from faster_whisper import BatchedInferencePipeline, WhisperModel
+    except ImportError as e:
+        raise ImportError(
+            f"Could not load faster-whisper: {e}. Please ensure it's installed."
+        )
+
+    logger.info(f"Loading faster-whisper CrisperWhisper ({compute_type})...")
+    model = WhisperModel(
+        _FASTER_WHISPER_MODEL_ID, device=device, compute_type=compute_type
+    )
+    return BatchedInferencePipeline(model=model)
+
+
+def release_crisper_whisper():
+    """Drop the process-wide CrisperWhisper models
+
+    Their memory is freed once no tokenizer still holds a reference.
+    """
+    with _shared_whisper_lock:
+        _load_shared_crisper_whisper.cache_clear()
+        _load_faster_whisper.cache_clear()
+
+
+def _side_stream(tensor):
+    """Create a CUDA stream for work on a tensor made on the current stream
+
+    The new stream waits for the work already queued on the current stream,
+    and the tensor's memory is kept from reuse until the side stream is done
+    with it.
+
+    Args:
+        tensor: Input of the work to run on the side stream
+
+    Returns:
+        CUDA stream, or None if the tensor is not on a CUDA device
+    """
+    if not tensor.is_cuda:
+        return None
+
+    stream = torch.cuda.Stream(device=tensor.device)
+    stream.wait_stream(torch.cuda.current_stream(tensor.device))
+    tensor.record_stream(stream)
+    return stream
+
+
+@lru_cache(maxsize=1)
+def _load_llama3_tokenizer():
+    """Load the Llama 3 tokenizer with special token handling
+
+    Loaded once per process and shared by all AudioTokenizers; encoding does
+    not modify the tokenizer.
+
+    Returns:
+        Configured tokenizer
+    """
+    tokenizer_name = "meta-llama/Llama-3.2-1B"
+    tokenizer = AutoTokenizer.from_pretrained(tokenizer_name)
+    bos = tokenizer.bos_token
+    eos = tokenizer.eos_token
+
+    # Configure the post-processor for correct generation
+    tokenizer._tokenizer.post_processor = TemplateProcessing(
+        single=f"{bos}:0 $A:0 {eos}:0",
+        pair=f"{bos}:0 $A:0 {eos}:0 {bos}:1 $B:1 {eos}:1",
+        special_tokens=[
+            (f"{bos}", tokenizer.bos_token_id),
+            (f"{eos}", tokenizer.eos_token_id),
+        ],
+    )
+
+    return tokenizer
+
 
 class AudioTokenizer:
     """Tokenizes audio into RVQ tokens using Mimi and Llama with improved memory management"""
 
-    def __init__(self, device="cuda"):
+    def __init__(
+        self,
+        device="cuda",
+        keep_whisper_loaded=False,
+        language="en",
+        whisper_precision: Literal["fp16", "int8"] = "fp16",
+        whisper_backend: Literal["transformers", "faster-whisper"] = "transformers",
+    ):
         """Initialize the audio tokenizer
 
         Args:
             device: Device to run inference on ("cpu", "cuda", "mps")
+            keep_whisper_loaded: Keep a process-wide CrisperWhisper model loaded
+                after transcribing, so later tokenizers skip loading it again
+                (released automatically when GPU memory runs low)
+            language: Language Whisper transcribes in, or None to detect it
+                for each input
+            whisper_precision: "fp16", or "int8" to load Whisper's linear
+                layers with int8 weights (CUDA with bitsandbytes installed)
+            whisper_backend: "transformers" for the Hugging Face pipeline, or
+                "faster-whisper" for batched CTranslate2 inference (requires
+                the faster-whisper package; the model stays loaded)
         """
         self.device = device
+        self.keep_whisper_loaded = keep_whisper_loaded
+        self.whisper_precision = whisper_precision
+        self.whisper_backend = whisper_backend
+        self.language = language
+
+        # Pinning the language skips Whisper's language detection pass
+        self._whisper_generate_kwargs = {"task": "transcribe", "num_beams": 1}
+        if language is not None:
+            self._whisper_generate_kwargs["language"] = language
         self._initialize_tokenizers()
 
         # Lazy-loaded models
@@ -77,14 +462,28 @@ class AudioTokenizer:
         self.whisper_pipeline = None
 
     def _initialize_tokenizers(self):
-        """Initialize Mimi RVQ tokenizer and Llama text tokenizer"""
-        logger.info("Initializing Mimi RVQ tokenizer...")
-        # Use our adapter which will handle platform differences
-        self.mimi = MimiTokenizer(device=self.device, num_codebooks=32)
-        self.sample_rate = self.mimi.sample_rate  # 24000 Hz
+        """Initialize the Llama text tokenizer; Mimi is created on first use"""
+        self._mimi = None
+        self.sample_rate = MIMI_SAMPLE_RATE  # 24000 Hz
 
         logger.info("Initializing Llama text tokenizer...")
-        self.text_tokenizer = self._load_llama3_tokenizer()
+        self.text_tokenizer = _load_llama3_tokenizer()
+
+    @property
+    def mimi(self):
+        """Mimi RVQ tokenizer, created on first access
+
+        Semantic-only tokenization never touches it, so it skips loading the
+        Mimi weights.
+
+        Returns:
+            MimiTokenizer for this tokenizer's device
+        """
+        if self._mimi is None:
+            logger.info("Initializing Mimi RVQ tokenizer...")
+            # Use our adapter which will handle platform differences
+            self._mimi = get_mimi_tokenizer(device=self.device, num_codebooks=32)
+        return self._mimi
 
     def _load_crisper_whisper(self):
         """Lazy-load the CrisperWhisper ASR model with Hugging Face Transformers"""
@@ -92,43 +491,11 @@ class AudioTokenizer:
             logger.info("CrisperWhisper model already loaded")
             return
 
-        # Log memory before loading
-        MemoryManager.log_memory_stats("Before loading CrisperWhisper")
-
-        logger.info("Loading CrisperWhisper ASR model...")
-        model_id = "nyrahealth/CrisperWhisper"
-
-        # Determine device type and torch dtype based on available hardware
-        device = self.device
-        torch_dtype = torch.float16 if torch.cuda.is_available() else torch.float32
-
-        # Load model
-        self.whisper_model = AutoModelForSpeechSeq2Seq.from_pretrained(
-            model_id,
-            torch_dtype=torch_dtype,
-            low_cpu_mem_usage=True,
-            use_safetensors=True,
-        )
-        self.whisper_model.to(device)
-
-        # Load processor
-        self.whisper_processor = AutoProcessor.from_pretrained(model_id)
-
-        # Create pipeline
-        self.whisper_pipeline = pipeline(
-            "automatic-speech-recognition",
-            model=self.whisper_model,
-            tokenizer=self.whisper_processor.tokenizer,
-            feature_extractor=self.whisper_processor.feature_extractor,
-            chunk_length_s=30,
-            batch_size=16,
-            return_timestamps="word",
-            torch_dtype=torch_dtype,
-            device=device,
-        )
-
-        # Log memory after loading
-        MemoryManager.log_memory_stats("After loading CrisperWhisper")
+        if self.keep_whisper_loaded:
+            models = get_crisper_whisper(self.device, self.whisper_precision)
+        else:
+            models = _load_crisper_whisper_models(self.device, self.whisper_precision)
+        self.whisper_model, self.whisper_processor, self.whisper_pipeline = models
 
     def _unload_crisper_whisper(self):
         """Unload CrisperWhisper model to free memory"""
@@ -138,8 +505,10 @@ class AudioTokenizer:
             # Log memory before unloading
             MemoryManager.log_memory_stats("Before unloading CrisperWhisper")
 
-            # Move model to CPU first (reduces fragmentation)
-            if self.device != "cpu" and torch.cuda.is_available():
+            # Move model to CPU first (reduces fragmentation). Quantized
+            # models cannot be moved.
+            quantized = getattr(self.whisper_model, "is_loaded_in_8bit", False)
+            if self.device != "cpu" and torch.cuda.is_available() and not quantized:
                 self.whisper_model = self.whisper_model.cpu()
 
             # Delete models and pipeline
@@ -157,6 +526,18 @@ class AudioTokenizer:
             # Log memory after unloading
             MemoryManager.log_memory_stats("After unloading CrisperWhisper")
 
+    def release_whisper(self):
+        """Release a CrisperWhisper model kept loaded with keep_whisper_loaded
+
+        Call this when done transcribing or when GPU memory is needed for
+        other models.
+        """
+        self.whisper_pipeline = None
+        self.whisper_model = None
+        self.whisper_processor = None
+        release_crisper_whisper()
+        MemoryManager.clear_gpu_memory()
+
     def _adjust_pauses_for_hf_pipeline_output(
         self, pipeline_output, split_threshold=0.12
     ):
@@ -170,6 +551,10 @@ class AudioTokenizer:
         Returns:
             Adjusted pipeline output
         """
+        # Pauses only exist between words
+        if len(pipeline_output["chunks"]) < 2:
+            return pipeline_output
+
         adjusted_chunks = pipeline_output["chunks"].copy()
 
         for i in range(len(adjusted_chunks) - 1):
@@ -207,63 +592,121 @@ class AudioTokenizer:
 
         Args:
             audio_path: Path to audio file (optional)
-            waveform: Audio waveform tensor (optional)
+            waveform: Audio waveform tensor at the Mimi sample rate (optional,
+                used instead of the file when given)
 
         Returns:
             Transcription result with word-level timestamps
         """
+        input_source = waveform if waveform is not None else audio_path
+        return self._transcribe_inputs([input_source])[0]
+
+    def _transcribe_inputs(self, inputs):
+        """Transcribe several inputs with one CrisperWhisper pipeline call
+
+        The pipeline batches the 30 s windows of all inputs together, so short
+        clips share encoder and decoder passes.
+
+        Args:
+            inputs: Audio file paths or waveform tensors at the Mimi sample rate
+
+        Returns:
+            List of transcription results with word-level timestamps
+        """
+        if self.whisper_backend == "faster-whisper":
+            return self._transcribe_inputs_faster_whisper(inputs)
+
         # Lazy-load the whisper model
         self._load_crisper_whisper()
 
-        # Determine input type (path or waveform)
-        input_source = audio_path
-
-        # If path doesn't exist but waveform is provided, save temporarily
-        temp_path = None
-        if (
-            audio_path is None or not os.path.exists(audio_path)
-        ) and waveform is not None:
-            temp_path = "/tmp/temp_whisper_input.wav"
-            torchaudio.save(temp_path, waveform, self.sample_rate)
-            input_source = temp_path
+        # Pass already loaded waveforms to the pipeline in memory, so the
+        # audio is neither written to disk nor decoded again. They are
+        # resampled to Whisper's rate here with the cached resampling kernel,
+        # which the pipeline would otherwise rebuild for every input.
+        whisper_rate = self.whisper_processor.feature_extractor.sampling_rate
+        input_sources = []
+        for source in inputs:
+            if isinstance(source, torch.Tensor):
+                samples = resample(
+                    source.squeeze(0).cpu().float(), self.sample_rate, whisper_rate
+                )
+                source = {"raw": samples.numpy(), "sampling_rate": whisper_rate}
+            input_sources.append(source)
 
         # Run transcription
-        crisper_whisper_output = self.whisper_pipeline(input_source)
+        crisper_whisper_outputs = self.whisper_pipeline(
+            input_sources, generate_kwargs=self._whisper_generate_kwargs
+        )
 
         # Adjust pauses for better timing
-        result = self._adjust_pauses_for_hf_pipeline_output(crisper_whisper_output)
+        results = [
+            self._adjust_pauses_for_hf_pipeline_output(output)
+            for output in crisper_whisper_outputs
+        ]
+
+        # Unload whisper model to free memory, unless it is kept loaded and
+        # enough GPU memory is left for the models that follow
+        if not self.keep_whisper_loaded:
+            self._unload_crisper_whisper()
+        else:
+            free_bytes = MemoryManager.gpu_free_bytes()
+            if free_bytes is not None and free_bytes < _WHISPER_MIN_FREE_BYTES:
+                logger.info("Low GPU memory, releasing the shared CrisperWhisper")
+                self.release_whisper()
 
-        # Clean up temporary file if created
-        if temp_path and os.path.exists(temp_path):
-            os.remove(temp_path)
+        return results
 
-        # Unload whisper model to free memory
-        self._unload_crisper_whisper()
+    def _transcribe_inputs_faster_whisper(self, inputs):
+        """Transcribe inputs with the faster-whisper backend
 
-        return result
+        Each input's 30 s windows are decoded in batches by CTranslate2. The
+        results have the same shape as the Hugging Face pipeline output.
 
-    def _load_llama3_tokenizer(self):
-        """Load the Llama 3 tokenizer with special token handling
+        Args:
+            inputs: Audio file paths or waveform tensors at the Mimi sample rate
 
         Returns:
-            Configured tokenizer
+            List of transcription results with word-level timestamps
         """
-        tokenizer_name = "meta-llama/Llama-3.2-1B"
-        tokenizer = AutoTokenizer.from_pretrained(tokenizer_name)
-        bos = tokenizer.bos_token
-        eos = tokenizer.eos_token
-
-        # Configure the post-processor for correct generation
-        tokenizer._tokenizer.post_processor = TemplateProcessing(
-            single=f"{bos}:0 $A:0 {eos}:0",
-            pair=f"{bos}:0 $A:0 {eos}:0 {bos}:1 $B:1 {eos}:1",
-            special_tokens=[
-                (f"{bos}", tokenizer.bos_token_id),
-                (f"{eos}", tokenizer.eos_token_id),
-            ],
-        )
+        on_cuda = str(self.device).startswith("cuda")
+        if not on_cuda:
+            compute_type = "int8"
+        elif self.whisper_precision == "int8":
+            compute_type = "int8_float16"
+        else:
+            compute_type = "float16"
+        with _shared_whisper_lock:
+            batched_model = _load_faster_whisper(
+                "cuda" if on_cuda else "cpu", compute_type
+            )
+
+        results = []
+        for source in inputs:
+            if isinstance(source, torch.Tensor):
+                source = resample(
+                    source.squeeze(0).cpu().float(),
+                    self.sample_rate,
+                    _FASTER_WHISPER_SAMPLE_RATE,
+                ).numpy()
+
+            segments, _ = batched_model.transcribe(
+                source, batch_size=16, word_timestamps=True, language=self.language
+            )
+
+            # Convert segments and words to the pipeline's text and chunks
+            text_parts = []
+            chunks = []
+            for segment in segments:
+                text_parts.append(segment.text)
+                for word in segment.words or []:
+                    chunks.append(
+                        {"text": word.word, "timestamp": (word.start, word.end)}
+                    )
 
-        return tokenizer
+            output = {"text": "".join(text_parts), "chunks": chunks}
+            results.append(self._adjust_pauses_for_hf_pipeline_output(output))
+
+        return results
 
     def create_semantic_to_rvq_mapping(self, word_timestamps, rvq_tokens=None):
         """
@@ -282,33 +725,22 @@ class AudioTokenizer:
         if not word_timestamps or len(word_timestamps) == 0:
             return semantic_to_rvq_map
 
-        # Calculate token frame rate (Mimi uses 12.5 Hz - 80ms per frame)
-        token_frame_rate = 12.5  # frames per second
+        # Convert all word start times to RVQ token indices at once
+        rvq_indices = _times_to_token_indices(word_timestamps, "start")
 
-        # Get max valid token index if rvq_tokens is provided
-        max_token_idx = None
+        # Ensure indices are valid if we have rvq_tokens
         if rvq_tokens is not None:
-            max_token_idx = rvq_tokens.shape[1] - 1
-
-        # Map each word index to the corresponding RVQ token index based on timing
-        for i, word_info in enumerate(word_timestamps):
-            # Get word timing - using start time from the timestamp
-            start_time = word_info["start"]
-
-            # Convert timestamp to RVQ token index
-            rvq_index = round(start_time * token_frame_rate)
-
-            # Ensure index is valid if we have rvq_tokens
-            if max_token_idx is not None:
-                rvq_index = min(max(0, rvq_index), max_token_idx)
+            np.clip(rvq_indices, 0, rvq_tokens.shape[1] - 1, out=rvq_indices)
 
-            # Map the word index (semantic token index) to the RVQ token index
-            semantic_to_rvq_map[i] = rvq_index
-
-        return semantic_to_rvq_map
+        # Map each word index (semantic token index) to its RVQ token index
+        return dict(enumerate(rvq_indices.tolist()))
 
     def tokenize(
-        self, audio_path: str, speaker_id: int = 0, semantic_only: bool = False
+        self,
+        audio_path: str,
+        speaker_id: int = 0,
+        semantic_only: bool = False,
+        keep_audio: bool = True,
     ) -> TokenizedAudio:
         """Tokenize audio to RVQ tokens or semantic tokens only
 
@@ -316,6 +748,8 @@ class AudioTokenizer:
             audio_path: Path to the audio file
             speaker_id: Speaker identifier
             semantic_only: If True, only perform semantic tokenization (faster)
+            keep_audio: If False, the result does not hold the normalized
+                waveform; extract_context_audio reads it back from the file
 
         Returns:
             TokenizedAudio object with tokens and metadata
@@ -324,49 +758,189 @@ class AudioTokenizer:
             f"Tokenizing audio from {audio_path}, semantic_only={semantic_only}"
         )
 
-        # Load audio and normalize
-        waveform, sr = torchaudio.load(audio_path)
-        if waveform.shape[0] > 1:  # Convert to mono
-            waveform = waveform.mean(dim=0, keepdim=True)
+        waveform, whisper_waveform = self._load_waveform(audio_path)
 
-        # Resample to Mimi sample rate if needed
-        if sr != self.sample_rate:
-            logger.info(f"Resampling from {sr}Hz to {self.sample_rate}Hz")
-            waveform = torchaudio.functional.resample(
-                waveform, orig_freq=sr, new_freq=self.sample_rate
+        # Tokenize with Mimi if not semantic_only. On CUDA Whisper transcribes
+        # in a worker thread while this thread queues the encoder on a side
+        # stream, so both models' host work and kernels overlap.
+        rvq_tokens = None
+        mimi_stream = None
+        transcription = None
+        if not semantic_only:
+            mimi_stream = _side_stream(waveform)
+            if mimi_stream is not None:
+                logger.info("Transcribing audio with CrisperWhisper...")
+                transcription = _transcription_executor.submit(
+                    self._transcribe_audio,
+                    audio_path=audio_path,
+                    waveform=whisper_waveform,
+                )
+            stream_context = (
+                torch.cuda.stream(mimi_stream)
+                if mimi_stream is not None
+                else contextlib.nullcontext()
             )
+            with stream_context:
+                rvq_tokens = self._encode_waveform(waveform)
 
-        # Normalize the audio
-        waveform = waveform / (torch.max(torch.abs(waveform)) + 1e-8)
+        # Move waveform back to CPU to free GPU memory
+        waveform = waveform.cpu()
 
-        # Initialize variables
-        rvq_tokens = None
-        semantic_tokens = None
-        llama_tokens = None
+        # Transcribe audio with CrisperWhisper, or wait for the worker
+        if transcription is not None:
+            crisper_whisper_result = transcription.result()
+        else:
+            logger.info("Transcribing audio with CrisperWhisper...")
+            crisper_whisper_result = self._transcribe_audio(
+                audio_path=audio_path, waveform=whisper_waveform
+            )
 
-        # Tokenize with Mimi if not semantic_only
-        if not semantic_only:
-            logger.info("Extracting RVQ tokens with Mimi...")
-            MemoryManager.log_memory_stats("Before Mimi tokenization")
+        # Wait for the encoder before the RVQ tokens are used on the default
+        # stream
+        if mimi_stream is not None and rvq_tokens.is_cuda:
+            current_stream = torch.cuda.current_stream(rvq_tokens.device)
+            current_stream.wait_stream(mimi_stream)
+            rvq_tokens.record_stream(current_stream)
 
-            waveform_device = waveform.to(self.device)
-            # The MimiTokenizer handles reshaping internally - no unsqueeze needed
-            rvq_tokens = self.mimi.encode(waveform_device)  # (num_codebooks, seq_len)
-            semantic_tokens = (
-                rvq_tokens[0].cpu().tolist()
-            )  # First codebook contains semantic tokens
+        tokenized_audio = self._build_tokenized_audio(
+            waveform, rvq_tokens, crisper_whisper_result, speaker_id, semantic_only
+        )
 
-            # Move waveform back to CPU to free GPU memory
-            waveform = waveform.cpu()
+        # Keep only the file and its peak level instead of the normalized
+        # waveform when the caller does not need the audio
+        if not keep_audio:
+            tokenized_audio.audio = None
+            tokenized_audio.audio_path = str(audio_path)
+            tokenized_audio.audio_peak = whisper_waveform.abs().amax().item()
 
-            MemoryManager.log_memory_stats("After Mimi tokenization")
+        # Clear GPU memory
+        MemoryManager.clear_gpu_memory()
 
-        # Transcribe audio with CrisperWhisper
-        logger.info("Transcribing audio with CrisperWhisper...")
-        crisper_whisper_result = self._transcribe_audio(
-            audio_path=audio_path, waveform=waveform
+        return tokenized_audio
+
+    def tokenize_batch(
+        self, audio_paths: List[str], speaker_id: int = 0, semantic_only: bool = False
+    ) -> List[TokenizedAudio]:
+        """Tokenize several audio files, transcribing them in one Whisper call
+
+        Whisper is loaded once and batches the windows of all files together.
+        Mimi encodes the files one by one, since the adapter encodes a single
+        sequence.
+
+        Args:
+            audio_paths: Paths to the audio files
+            speaker_id: Speaker identifier
+            semantic_only: If True, only perform semantic tokenization (faster)
+
+        Returns:
+            TokenizedAudio objects in the order of audio_paths
+        """
+        logger.info(
+            f"Tokenizing {len(audio_paths)} audio files, semantic_only={semantic_only}"
         )
 
+        waveforms = []
+        all_rvq_tokens = []
+        whisper_inputs = []
+        for audio_path in audio_paths:
+            waveform, whisper_waveform = self._load_waveform(audio_path)
+
+            # Tokenize with Mimi if not semantic_only
+            rvq_tokens = None
+            if not semantic_only:
+                rvq_tokens = self._encode_waveform(waveform)
+
+            waveforms.append(waveform.cpu())
+            all_rvq_tokens.append(rvq_tokens)
+            whisper_inputs.append(whisper_waveform)
+
+        # Transcribe all files with CrisperWhisper
+        logger.info("Transcribing audio with CrisperWhisper...")
+        crisper_whisper_results = self._transcribe_inputs(whisper_inputs)
+
+        tokenized_audios = [
+            self._build_tokenized_audio(
+                waveform, rvq_tokens, result, speaker_id, semantic_only
+            )
+            for waveform, rvq_tokens, result in zip(
+                waveforms, all_rvq_tokens, crisper_whisper_results
+            )
+        ]
+
+        # Clear GPU memory
+        MemoryManager.clear_gpu_memory()
+
+        return tokenized_audios
+
+    def _load_waveform(self, audio_path):
+        """Load audio for tokenization
+
+        Args:
+            audio_path: Path to the audio file
+
+        Returns:
+            Tuple of (peak-normalized waveform on the device, waveform at its
+            original level on the CPU for Whisper), both mono at the Mimi
+            sample rate
+        """
+        # Load mono audio at the Mimi sample rate (cached per file and rate)
+        waveform = load_audio_resampled(audio_path, self.sample_rate)
+
+        # Whisper transcribes the audio at its original level, as read from
+        # the file
+        whisper_waveform = waveform
+
+        # Normalize the audio on the device, dividing in place. The cached
+        # waveform is shared, so normalize a copy of it (the device transfer).
+        waveform = waveform.to(self.device, copy=True)
+        peak = waveform.abs().amax()
+        waveform.div_(peak.add_(1e-8))
+
+        return waveform, whisper_waveform
+
+    def _encode_waveform(self, waveform):
+        """Extract RVQ tokens from a normalized waveform with Mimi
+
+        Args:
+            waveform: Normalized mono waveform
+
+        Returns:
+            RVQ tokens of shape (num_codebooks, seq_len)
+        """
+        logger.info("Extracting RVQ tokens with Mimi...")
+        MemoryManager.log_memory_stats("Before Mimi tokenization")
+
+        # The MimiTokenizer handles reshaping internally - no unsqueeze needed
+        rvq_tokens = self.mimi.encode(waveform)  # (num_codebooks, seq_len)
+
+        MemoryManager.log_memory_stats("After Mimi tokenization")
+
+        return rvq_tokens
+
+    def _build_tokenized_audio(
+        self, waveform, rvq_tokens, crisper_whisper_result, speaker_id, semantic_only
+    ):
+        """Combine Mimi tokens and a transcription into a TokenizedAudio
+
+        Args:
+            waveform: Normalized mono waveform
+            rvq_tokens: RVQ tokens, None when semantic_only
+            crisper_whisper_result: Transcription result with word timestamps
+            speaker_id: Speaker identifier
+            semantic_only: If True, only perform semantic tokenization
+
+        Returns:
+            TokenizedAudio object with tokens and metadata
+        """
+        semantic_tokens = None
+        llama_tokens = None
+
+        if not semantic_only:
+            # First codebook contains semantic tokens. Keep them as a view of
+            # the host copy of the RVQ tokens rather than a list of ints.
+            rvq_tokens = rvq_tokens.cpu()
+            semantic_tokens = rvq_tokens[0]
+
         # Extract text from the transcription result
         transcribed_text = crisper_whisper_result["text"]
 
@@ -417,18 +991,16 @@ class AudioTokenizer:
                 f"Llama tokens count: {len(llama_tokens) if llama_tokens else 0}"
             )
 
-        # Clear GPU memory
-        MemoryManager.clear_gpu_memory()
-
         return TokenizedAudio(
             audio=waveform.squeeze(0).cpu(),
             sample_rate=self.sample_rate,
-            rvq_tokens=rvq_tokens.cpu() if rvq_tokens is not None else None,
+            rvq_tokens=rvq_tokens,
             text=transcribed_text,
             segments=segments,
-            semantic_tokens=semantic_tokens if not semantic_only else None,
+            semantic_tokens=semantic_tokens,
             text_to_token_map=text_to_token_map,
             token_to_text_map=token_to_text_map,
+            sorted_text_positions=text_to_token_map.keys_array,
             speaker_id=speaker_id,
             word_timestamps=word_timestamps,
             llama_tokens=llama_tokens,
@@ -455,7 +1027,7 @@ class AudioTokenizer:
 
     def _create_semantic_text_token_map(
         self, text: str, word_timestamps: List[Dict]
-    ) -> Tuple[Dict[int, int], Dict[int, int]]:
+    ) -> Tuple[PositionMap, PositionMap]:
         """Create a simplified mapping between text and semantic token positions
 
         When in semantic_only mode, this creates an approximate mapping that can
@@ -468,8 +1040,8 @@ class AudioTokenizer:
         Returns:
             Tuple of (text_to_token_map, token_to_text_map)
         """
-        text_to_token_map = {}
-        token_to_text_map = {}
+        text_to_token = np.full(len(text), -1, dtype=np.int32)
+        token_to_text = np.full(len(word_timestamps), -1, dtype=np.int32)
 
         # Track the current position in the text
         text_pos = 0
@@ -479,29 +1051,27 @@ class AudioTokenizer:
         for word_data in word_timestamps:
             word = word_data["text"]
 
-            # Find the word position in text
-            word_pos = text[text_pos:].find(word)
+            # Find the word position in text, searching from the previous word
+            word_pos = text.find(word, text_pos)
             if word_pos >= 0:
-                word_pos += text_pos
-
-                # Map each character in the word to an approximate token position
-                for i in range(len(word)):
-                    char_pos = word_pos + i
-                    # Each character in a word maps to the same token index for simplicity
-                    text_to_token_map[char_pos] = token_idx
-                    token_to_text_map[token_idx] = char_pos
+                # Each character in a word maps to the same token index for
+                # simplicity, and the token maps back to the word's last character
+                word_end = word_pos + len(word)
+                text_to_token[word_pos:word_end] = token_idx
+                if word:
+                    token_to_text[token_idx] = word_end - 1
 
                 # Move to next token position
                 token_idx += 1
 
                 # Update text position for next search
-                text_pos = word_pos + len(word)
+                text_pos = word_end
 
-        return text_to_token_map, token_to_text_map
+        return PositionMap(text_to_token), PositionMap(token_to_text)
 
     def _align_text_to_tokens(
         self, text: str, word_timestamps: List[Dict], rvq_tokens: torch.Tensor
-    ) -> Tuple[Dict[int, int], Dict[int, int]]:
+    ) -> Tuple[PositionMap, PositionMap]:
         """Align text positions to token positions
 
         Args:
@@ -512,57 +1082,53 @@ class AudioTokenizer:
         Returns:
             Tuple of (text_to_token_map, token_to_text_map)
         """
-        # Calculate token frame rate: Mimi uses 12.5 Hz (80ms per frame)
-        token_frame_rate = 12.5  # frames per second
+        text_to_token = np.full(len(text), -1, dtype=np.int32)
+        token_to_text = np.full(rvq_tokens.shape[1], -1, dtype=np.int32)
 
-        text_to_token_map = {}
-        token_to_text_map = {}
+        # Convert all word times to token indices, clamped to the valid range
+        max_token_idx = rvq_tokens.shape[1] - 1
+        start_indices = _times_to_token_indices(word_timestamps, "start")
+        end_indices = _times_to_token_indices(word_timestamps, "end")
+        np.clip(start_indices, 0, max_token_idx, out=start_indices)
+        np.clip(end_indices, 0, max_token_idx, out=end_indices)
 
         # Track the current position in the text
         text_pos = 0
 
         # For each word with timestamp
-        for word_data in word_timestamps:
+        for word_data, start_token_idx, end_token_idx in zip(
+            word_timestamps, start_indices.tolist(), end_indices.tolist()
+        ):
             word = word_data["text"]
-            start_time = word_data["start"]
-            end_time = word_data["end"]
-
-            # Convert times to token indices
-            start_token_idx = round(start_time * token_frame_rate)
-            end_token_idx = round(end_time * token_frame_rate)
-
-            # Clamp to valid range
-            start_token_idx = min(max(0, start_token_idx), rvq_tokens.shape[1] - 1)
-            end_token_idx = min(max(0, end_token_idx), rvq_tokens.shape[1] - 1)
 
             # Find the word position in text (may need to handle whitespace/punctuation differences)
-            word_pos = text[text_pos:].find(word)
+            word_pos = text.find(word, text_pos)
             if word_pos >= 0:
-                word_pos += text_pos
-
                 # Map each character in the word to the appropriate token
                 word_len = len(word)
-                for i in range(word_len):
-                    char_pos = word_pos + i
-
-                    # Calculate interpolated token position
-                    token_pos = start_token_idx
-                    if end_token_idx > start_token_idx:
-                        # Linearly interpolate between start and end
-                        progress = i / word_len
-                        token_pos = int(
-                            start_token_idx
-                            + progress * (end_token_idx - start_token_idx)
-                        )
-
-                    # Add to maps
-                    text_to_token_map[char_pos] = token_pos
-                    token_to_text_map[token_pos] = char_pos
+                word_chars = text_to_token[word_pos : word_pos + word_len]
+                if end_token_idx > start_token_idx:
+                    # Linearly interpolate between start and end
+                    progress = np.arange(word_len) / word_len
+                    word_chars[:] = start_token_idx + progress * (
+                        end_token_idx - start_token_idx
+                    )
+                else:
+                    word_chars[:] = start_token_idx
 
                 # Update text position for next search
                 text_pos = word_pos + word_len
 
-        return text_to_token_map, token_to_text_map
+        # Map each token back to the last character mapped to it. Words are
+        # found left to right, so the last character is the largest position.
+        char_positions = np.flatnonzero(text_to_token >= 0)
+        np.maximum.at(
+            token_to_text,
+            text_to_token[char_positions],
+            char_positions.astype(np.int32),
+        )
+
+        return PositionMap(text_to_token), PositionMap(token_to_text)
 
     def reconstruct_audio(self, rvq_tokens: torch.Tensor) -> Tuple[torch.Tensor, int]:
         """Reconstruct audio from RVQ tokens
@@ -602,41 +1168,20 @@ class AudioTokenizer:
         """
         start_char_idx, end_char_idx = text_range
 
-        # For start position: find the nearest mapped character position
-        if start_char_idx in tokenized_audio.text_to_token_map:
-            start_token_idx = tokenized_audio.text_to_token_map[start_char_idx]
-        else:
-            # Find nearest position at or before the start
-            available_positions = [
-                pos
-                for pos in tokenized_audio.text_to_token_map.keys()
-                if pos <= start_char_idx
-            ]
-            if available_positions:
-                nearest_pos = max(available_positions)
-                start_token_idx = tokenized_audio.text_to_token_map[nearest_pos]
-            else:
-                # If no positions before, take the earliest available
-                nearest_pos = min(tokenized_audio.text_to_token_map.keys())
-                start_token_idx = tokenized_audio.text_to_token_map[nearest_pos]
-
-        # For end position: find the next position after the end
-        if end_char_idx in tokenized_audio.text_to_token_map:
-            end_token_idx = tokenized_audio.text_to_token_map[end_char_idx]
-        else:
-            # Find the next position that's after our end_char_idx
-            available_positions = [
-                pos
-                for pos in tokenized_audio.text_to_token_map.keys()
-                if pos >= end_char_idx
-            ]
-            if available_positions:
-                next_pos = min(available_positions)
-                end_token_idx = tokenized_audio.text_to_token_map[next_pos]
-            else:
-                # If no positions after, take the latest available
-                next_pos = max(tokenized_audio.text_to_token_map.keys())
-                end_token_idx = tokenized_audio.text_to_token_map[next_pos]
+        text_to_token_map = tokenized_audio.text_to_token_map
+        positions = tokenized_audio.sorted_text_positions
+        if positions is None:
+            positions = np.array(sorted(text_to_token_map), dtype=np.int64)
+
+        # For start position: find the nearest mapped character position at or
+        # before the start, or take the earliest available if there is none
+        i = int(np.searchsorted(positions, start_char_idx, side="right")) - 1
+        start_token_idx = text_to_token_map[int(positions[max(i, 0)])]
+
+        # For end position: find the next mapped character position at or
+        # after the end, or take the latest available if there is none
+        i = int(np.searchsorted(positions, end_char_idx, side="left"))
+        end_token_idx = text_to_token_map[int(positions[min(i, len(positions) - 1)])]
 
         logger.info(
             f"Text range {text_range} maps to token range [{start_token_idx}, {end_token_idx}]"
@@ -659,22 +1204,35 @@ class AudioTokenizer:
         Returns:
             Audio tensor with context
         """
-        # Convert token indices to time (seconds)
-        token_frame_rate = 12.5  # frames per second
-        start_time = edit_range[0] / token_frame_rate
-        end_time = edit_range[1] / token_frame_rate
+        # Convert token indices to time (seconds), for logging
+        start_time = edit_range[0] * MIMI_FRAME_RATE_DEN / MIMI_FRAME_RATE_NUM
+        end_time = edit_range[1] * MIMI_FRAME_RATE_DEN / MIMI_FRAME_RATE_NUM
 
-        # Calculate context boundaries (in samples)
+        # Calculate context boundaries (in samples). Frame boundaries are
+        # exact in integer arithmetic (1920 samples per frame at 24 kHz).
         sample_rate = tokenized_audio.sample_rate
         context_samples = int(context_seconds * sample_rate)
-
-        start_sample = max(0, int(start_time * sample_rate) - context_samples)
-        end_sample = min(
-            len(tokenized_audio.audio), int(end_time * sample_rate) + context_samples
+        edit_start_sample = (
+            edit_range[0] * sample_rate * MIMI_FRAME_RATE_DEN // MIMI_FRAME_RATE_NUM
         )
+        edit_end_sample = (
+            edit_range[1] * sample_rate * MIMI_FRAME_RATE_DEN // MIMI_FRAME_RATE_NUM
+        )
+
+        # Audio that was not kept is read back from its file (cached from
+        # tokenization) and only the context is normalized
+        audio = tokenized_audio.audio
+        if audio is None:
+            audio = load_audio_resampled(tokenized_audio.audio_path, sample_rate)
+            audio = audio.squeeze(0)
+
+        start_sample = max(0, edit_start_sample - context_samples)
+        end_sample = min(len(audio), edit_end_sample + context_samples)
 
         # Extract context audio
-        context_audio = tokenized_audio.audio[start_sample:end_sample]
+        context_audio = audio[start_sample:end_sample]
+        if tokenized_audio.audio is None:
+            context_audio = context_audio / (tokenized_audio.audio_peak + 1e-8)
 
         logger.info(
             f"Extracted context audio from {start_time - context_seconds:.2f}s to {end_time + context_seconds:.2f}s"
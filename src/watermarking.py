@@ -6,8 +6,8 @@ import argparse
 
 import silentcipher
 import torch
-import torchaudio
 from loguru import logger
+from src.audio_utils import load_audio as _read_audio, resample
 from src.memory_manager import MemoryManager
 
 # This watermark key is public, it is not secure.
@@ -83,9 +83,7 @@ def watermark(
     audio_array = audio_array.to(device)
 
     # Resample to 44.1kHz (required by watermarker)
-    audio_array_44khz = torchaudio.functional.resample(
-        audio_array, orig_freq=sample_rate, new_freq=44100
-    )
+    audio_array_44khz = resample(audio_array, orig_freq=sample_rate, new_freq=44100)
 
     # Apply watermark
     encoded, _ = watermarker.encode_wav(
@@ -94,9 +92,7 @@ def watermark(
 
     # Resample back to original rate if needed
     output_sample_rate = min(44100, sample_rate)
-    encoded = torchaudio.functional.resample(
-        encoded, orig_freq=44100, new_freq=output_sample_rate
-    )
+    encoded = resample(encoded, orig_freq=44100, new_freq=output_sample_rate)
 
     # Move result to CPU to free GPU memory
     result = encoded.cpu()
@@ -143,7 +139,7 @@ def verify(
     watermarked_audio = watermarked_audio.to(device)
 
     # Resample to 44.1kHz (required by watermarker)
-    watermarked_audio_44khz = torchaudio.functional.resample(
+    watermarked_audio_44khz = resample(
         watermarked_audio, orig_freq=sample_rate, new_freq=44100
     )
 
@@ -197,7 +193,7 @@ def load_audio(audio_path: str) -> tuple[torch.Tensor, int]:
     Returns:
         Tuple of audio tensor and sample rate
     """
-    audio_array, sample_rate = torchaudio.load(audio_path)
+    audio_array, sample_rate = _read_audio(audio_path)
     audio_array = audio_array.mean(dim=0)
     return audio_array, int(sample_rate)
 
@@ -2,15 +2,37 @@ import os
 import sys
 import pytest
 import torch
+from dataclasses import replace
 from pathlib import Path
 
 # Adjust path to import from src
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from src.token_store import TokenStore
+from src.token_store import (
+    TensorPatch,
+    TokenStore,
+    cleanup_expired_token_stores,
+    cleanup_token_store,
+    get_token_store_by_id,
+    register_token_store,
+    stop_token_store_reaper,
+)
+from src.tokenization import TokenizedAudio
 from src.semantic_edit import EditOperation
 
 
+# Helpers
+def random_audio(num_samples, generator):
+    """Random audio on the 16-bit PCM grid, so archiving it is lossless"""
+    pcm = torch.randint(-32767, 32768, (num_samples,), generator=generator)
+    return pcm.to(torch.float32) / 32767.0
+
+
+def splice(tensor, start, end, middle):
+    """Replace tensor[..., start:end] with middle along the last dimension"""
+    return torch.cat([tensor[..., :start], middle, tensor[..., end:]], dim=-1)
+
+
 # Fixtures
 @pytest.fixture(scope="module")
 def sample_audio():
@@ -41,6 +63,22 @@ def initialized_store(token_store, sample_audio):
     return token_store
 
 
+@pytest.fixture
+def synthetic_store(token_store):
+    """TokenStore holding random audio and tokens, without running the models"""
+    generator = torch.Generator().manual_seed(0)
+    token_store.current_state = TokenizedAudio(
+        audio=random_audio(24000, generator),
+        sample_rate=24000,
+        rvq_tokens=torch.randint(0, 2048, (8, 13), generator=generator),
+        text="synthetic",
+        text_to_token_map={},
+        token_to_text_map={},
+        word_timestamps=[],
+    )
+    return token_store
+
+
 @pytest.fixture
 def word_token_indices(initialized_store):
     """Fixture to find token indices for specific words in the text"""
@@ -159,3 +197,109 @@ def test_multiple_edit_operations(initialized_store, word_token_indices):
     assert "thanks" in updated_text
     assert initialized_store.current_version_index == 1
     assert len(initialized_store.versions) == 2
+
+
+@pytest.mark.parametrize(
+    "make_new",
+    [
+        # Prefix only: the end of the base is replaced
+        lambda base: splice(base, 6, 10, -base[..., 6:10] - 1),
+        # Suffix only: the start of the base is replaced
+        lambda base: splice(base, 0, 3, -base[..., 0:3] - 1),
+        # Empty middle: a span is deleted
+        lambda base: splice(base, 3, 7, base[..., :0]),
+        # Identical tensors
+        lambda base: base.clone(),
+        # Length-changing replacement in the middle
+        lambda base: splice(base, 4, 5, -base[..., 2:5] - 1),
+        # Everything replaced
+        lambda base: -base - 1,
+    ],
+    ids=["prefix", "suffix", "empty_middle", "identical", "resize", "all"],
+)
+@pytest.mark.parametrize("shape", [(10,), (4, 10)])
+def test_tensor_patch_round_trip(make_new, shape):
+    """TensorPatch.apply rebuilds the tensor it was computed from"""
+    base = torch.arange(torch.Size(shape).numel()).reshape(shape)
+    new = make_new(base)
+
+    patch = TensorPatch.between(base, new)
+
+    assert torch.equal(patch.apply(base), new)
+    patch_len = patch.prefix_len + patch.middle.shape[-1] + patch.suffix_len
+    assert patch_len == new.shape[-1]
+
+
+def test_tensor_patch_cases():
+    """Patches store only the span that differs"""
+    base = torch.arange(10)
+
+    patch = TensorPatch.between(base, splice(base, 6, 10, torch.tensor([-1])))
+    assert (patch.prefix_len, patch.suffix_len) == (6, 0)
+
+    patch = TensorPatch.between(base, splice(base, 0, 3, torch.tensor([-1, -2])))
+    assert (patch.prefix_len, patch.suffix_len) == (0, 7)
+
+    patch = TensorPatch.between(base, splice(base, 3, 7, base[:0]))
+    assert (patch.prefix_len, patch.suffix_len, patch.middle.numel()) == (3, 3, 0)
+
+    assert TensorPatch.between(base, None) is None
+    patch = TensorPatch.between(None, base)
+    assert torch.equal(patch.apply(None), base)
+
+
+def test_version_history_round_trip(synthetic_store):
+    """Versions stored as checkpoints, diffs and spill files restore exactly"""
+    generator = torch.Generator().manual_seed(1)
+    state = synthetic_store.current_state
+    expected = [(state.audio, state.rvq_tokens)]
+    synthetic_store.save_version("Original")
+
+    for step in range(1, 25):
+        # Replace one frame (1920 samples) with 1 frame, 2 frames or nothing
+        audio, tokens = expected[-1]
+        start = step % 5
+        num_frames = [1, 2, 0][step % 3]
+        new_audio = random_audio(num_frames * 1920, generator)
+        new_tokens = torch.randint(0, 2048, (8, num_frames), generator=generator)
+
+        audio = splice(audio, start * 1920, (start + 1) * 1920, new_audio)
+        tokens = splice(tokens, start, start + 1, new_tokens)
+        expected.append((audio, tokens))
+
+        synthetic_store.current_state = replace(
+            synthetic_store.current_state, audio=audio, rvq_tokens=tokens
+        )
+        synthetic_store.save_version(f"Edit {step}")
+
+    versions = synthetic_store.versions
+    assert len(versions) == 25
+    # Old versions are spilled to disk, recent ones stored as diffs
+    assert versions[0].token_data is None and versions[0].spill_path
+    assert versions[5].token_data is None and versions[5].spill_path
+    assert versions[-1].diff is not None
+
+    for version_index in [0, 5, 9, 10, 11, 17, 24, 3, 20, 24]:
+        state = synthetic_store.restore_version(version_index=version_index)
+        audio, tokens = expected[version_index]
+        assert torch.equal(state.audio.cpu(), audio)
+        assert torch.equal(state.rvq_tokens.cpu(), tokens)
+
+
+def test_expired_store_is_cleaned_up(synthetic_store):
+    """Registered stores not accessed within max_age are cleaned up and removed"""
+    synthetic_store.save_version("Original")
+    session_id = register_token_store(synthetic_store)
+    try:
+        # A recently accessed store is kept
+        assert cleanup_expired_token_stores(max_age=60) == []
+        assert get_token_store_by_id(session_id) is synthetic_store
+
+        synthetic_store.last_accessed -= 120
+        assert cleanup_expired_token_stores(max_age=60) == [session_id]
+        assert get_token_store_by_id(session_id) is None
+        assert synthetic_store.current_state is None
+        assert synthetic_store.versions == []
+    finally:
+        cleanup_token_store(session_id)
+        stop_token_store_reaper()
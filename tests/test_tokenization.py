@@ -0,0 +1,206 @@
+import os
+import random
+import sys
+import numpy as np
+import pytest
+import torch
+
+# Adjust path to import from src
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.tokenization import AudioTokenizer, PositionMap, TokenizedAudio
+
+
+# Reference implementations with the dict semantics the maps replaced
+def reference_align(text, word_timestamps, num_tokens):
+    """Dict-based text/token alignment, as before PositionMap"""
+    text_to_token_map = {}
+    token_to_text_map = {}
+    text_pos = 0
+    for word_data in word_timestamps:
+        word = word_data["text"]
+        start_token_idx = min(max(0, round(word_data["start"] * 12.5)), num_tokens - 1)
+        end_token_idx = min(max(0, round(word_data["end"] * 12.5)), num_tokens - 1)
+        word_pos = text[text_pos:].find(word)
+        if word_pos >= 0:
+            word_pos += text_pos
+            word_len = len(word)
+            for i in range(word_len):
+                token_pos = start_token_idx
+                if end_token_idx > start_token_idx:
+                    progress = i / word_len
+                    token_pos = int(
+                        start_token_idx + progress * (end_token_idx - start_token_idx)
+                    )
+                text_to_token_map[word_pos + i] = token_pos
+                token_to_text_map[token_pos] = word_pos + i
+            text_pos = word_pos + word_len
+    return text_to_token_map, token_to_text_map
+
+
+def reference_semantic_map(text, word_timestamps):
+    """Dict-based semantic text/token map, as before PositionMap"""
+    text_to_token_map = {}
+    token_to_text_map = {}
+    text_pos = 0
+    token_idx = 0
+    for word_data in word_timestamps:
+        word = word_data["text"]
+        word_pos = text[text_pos:].find(word)
+        if word_pos >= 0:
+            word_pos += text_pos
+            for i in range(len(word)):
+                text_to_token_map[word_pos + i] = token_idx
+                token_to_text_map[token_idx] = word_pos + i
+            token_idx += 1
+            text_pos = word_pos + len(word)
+    return text_to_token_map, token_to_text_map
+
+
+def reference_find_token_range(text_to_token_map, text_range):
+    """Nearest-position token range lookup on a dict, as before searchsorted"""
+    start_char_idx, end_char_idx = text_range
+    before = [pos for pos in text_to_token_map if pos <= start_char_idx]
+    start_pos = max(before) if before else min(text_to_token_map)
+    after = [pos for pos in text_to_token_map if pos >= end_char_idx]
+    end_pos = min(after) if after else max(text_to_token_map)
+    return text_to_token_map[start_pos], text_to_token_map[end_pos]
+
+
+def random_transcript(rng):
+    """Random text with word timestamps, including words missing from the text"""
+    words = [
+        "".join(rng.choice("abc") for _ in range(rng.randint(0, 6)))
+        for _ in range(rng.randint(0, 15))
+    ]
+    text = " ".join(words) + rng.choice(["", "."])
+    word_timestamps = []
+    time = 0.0
+    for word in words + ["zz"]:
+        duration = rng.random() * 1.5
+        word_timestamps.append({"text": word, "start": time, "end": time + duration})
+        time += duration * rng.random()
+    return text, word_timestamps
+
+
+# Fixtures
+@pytest.fixture
+def tokenizer():
+    """Tokenizer without models; the alignment helpers use no model state"""
+    return object.__new__(AudioTokenizer)
+
+
+@pytest.fixture
+def position_map():
+    """Map with keys 1, 2 and 5 mapped"""
+    return PositionMap(np.array([-1, 3, 0, -1, -1, 7], dtype=np.int32))
+
+
+# Tests
+def test_position_map_lookup(position_map):
+    """Mapped keys behave like a dict, including numpy integer keys"""
+    assert dict(position_map) == {1: 3, 2: 0, 5: 7}
+    assert list(position_map) == [1, 2, 5]
+    assert len(position_map) == 3
+    assert position_map[np.int64(5)] == 7
+    assert np.int32(2) in position_map
+    assert position_map.get(1) == 3
+
+
+@pytest.mark.parametrize("key", [0, 3, 6, -1, -5, 100, "1", None])
+def test_position_map_missing_keys(position_map, key):
+    """Unmapped, negative, out-of-range and non-integer keys are missing"""
+    assert key not in position_map
+    assert position_map.get(key) is None
+    with pytest.raises(KeyError):
+        position_map[key]
+
+
+def test_position_map_empty():
+    """An empty map is falsy and has no keys"""
+    empty = PositionMap(np.full(4, -1, dtype=np.int32))
+    assert not empty
+    assert dict(empty) == {}
+    assert len(empty.keys_array) == 0
+
+
+def test_align_matches_dict_semantics(tokenizer):
+    """Aligned maps equal the dict-based alignment on random transcripts"""
+    rng = random.Random(0)
+    for _ in range(300):
+        text, word_timestamps = random_transcript(rng)
+        num_tokens = rng.randint(1, 40)
+        rvq_tokens = torch.zeros((32, num_tokens), dtype=torch.long)
+
+        text_to_token, token_to_text = tokenizer._align_text_to_tokens(
+            text, word_timestamps, rvq_tokens
+        )
+        expected = reference_align(text, word_timestamps, num_tokens)
+
+        assert dict(text_to_token) == expected[0]
+        assert dict(token_to_text) == expected[1]
+        assert list(text_to_token) == sorted(expected[0])
+
+
+def test_semantic_map_matches_dict_semantics(tokenizer):
+    """Semantic maps equal the dict-based maps on random transcripts"""
+    rng = random.Random(1)
+    for _ in range(300):
+        text, word_timestamps = random_transcript(rng)
+
+        text_to_token, token_to_text = tokenizer._create_semantic_text_token_map(
+            text, word_timestamps
+        )
+        expected = reference_semantic_map(text, word_timestamps)
+
+        assert dict(text_to_token) == expected[0]
+        assert dict(token_to_text) == expected[1]
+
+
+def test_align_empty_word_list(tokenizer):
+    """Without words both maps are empty"""
+    rvq_tokens = torch.zeros((32, 10), dtype=torch.long)
+    text_to_token, token_to_text = tokenizer._align_text_to_tokens(
+        "some text", [], rvq_tokens
+    )
+    assert not text_to_token
+    assert not token_to_text
+
+    text_to_token, token_to_text = tokenizer._create_semantic_text_token_map(
+        "some text", []
+    )
+    assert not text_to_token
+    assert not token_to_text
+
+
+@pytest.mark.parametrize("with_sorted_positions", [True, False])
+def test_find_token_range_matches_dict_semantics(tokenizer, with_sorted_positions):
+    """Nearest-position lookups equal the dict-based search"""
+    rng = random.Random(2)
+    for _ in range(100):
+        text, word_timestamps = random_transcript(rng)
+        rvq_tokens = torch.zeros((32, 40), dtype=torch.long)
+        text_to_token, token_to_text = tokenizer._align_text_to_tokens(
+            text, word_timestamps, rvq_tokens
+        )
+        if not text_to_token:
+            continue
+
+        tokenized_audio = TokenizedAudio(
+            audio=None,
+            sample_rate=24000,
+            rvq_tokens=rvq_tokens,
+            text=text,
+            text_to_token_map=text_to_token,
+            token_to_text_map=token_to_text,
+            sorted_text_positions=(
+                text_to_token.keys_array if with_sorted_positions else None
+            ),
+        )
+        reference_map = dict(text_to_token)
+
+        for start in range(-1, len(text) + 2):
+            end = start + rng.randint(0, 5)
+            assert tokenizer.find_token_range(
+                tokenized_audio, (start, end)
+            ) == reference_find_token_range(reference_map, (start, end))